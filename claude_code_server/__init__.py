@@ -4,9 +4,10 @@ Claude Code Server - A Python library to interact with Claude using the official
 
 from .client import ClaudeClient
 from .agent import ClaudeAgent
-from .session import SessionManager, InMemorySessionStore
+from .session import SessionManager, InMemorySessionStore, RedisSessionStore
 from .file_session_store import FileSessionStore
 from .simple_agent import SimpleAgent
+from .process_pool import ClaudeProcessPool
 from .types import (
     ClaudeResponse,
     ClaudeMessage,
@@ -34,9 +35,11 @@ __all__ = [
     # Core clients
     "ClaudeClient",
     "ClaudeAgent",
+    "ClaudeProcessPool",
     # Session management
     "SessionManager",
     "InMemorySessionStore",
+    "RedisSessionStore",
     "FileSessionStore",
     # Simple agent
     "SimpleAgent",
@@ -4,11 +4,13 @@
 Readability counts.
 """
 
+import asyncio
+from collections import OrderedDict
 from typing import Callable, Optional
 
 from .client import ClaudeClient
 from .session import SessionManager, SessionStore
-from .types import ClaudeConfig, ClaudeResponse
+from .types import ClaudeConfig, ClaudeMessage, ClaudeResponse, SessionData
 from .logger import logger
 
 
@@ -26,6 +28,8 @@ class ClaudeAgent:
         config: Optional[ClaudeConfig] = None,
         session_store: Optional[SessionStore] = None,
         message_formatter: Optional[Callable] = None,
+        process_pool_size: int = 0,
+        session_cache_size: int = 0,
     ):
         """初始化代理
         
@@ -34,10 +38,20 @@ class ClaudeAgent:
             session_store: 会话存储（默认内存存储）
             message_formatter: 消息格式化函数
                 签名: (message, user_id, metadata) -> formatted_message
+            process_pool_size: 保持的空闲 Claude 进程数量（0 表示每次调用启动新进程）
+                同一会话的后续对话会复用持有该会话的进程；进程被会话占用后补充新的空闲进程，
+                总数不超过 4 倍，空闲会话进程按 ClaudeProcessPool 的 idle_timeout 回收
+            session_cache_size: 内存中缓存的会话数量（0 表示每次都从存储读取）
+                命中时仍会检查会话是否存在（过期或被删除则重新加载），
+                但不会发现其他进程的修改，多个进程共享存储时应保持为 0
         """
         self.client = ClaudeClient(config=config)
         self.session_manager = SessionManager(store=session_store)
         self.message_formatter = message_formatter
+        self.session_cache_size = session_cache_size
+        self._session_cache: "OrderedDict[str, SessionData]" = OrderedDict()
+        if process_pool_size > 0:
+            self.client.start_process_pool(process_pool_size)
 
     def chat(
         self,
@@ -59,6 +73,59 @@ class ClaudeAgent:
         Returns:
             Claude 的响应
         """
+        session_id, session, formatted_message = self._prepare_chat(
+            message, user_id, session_id, metadata
+        )
+
+        # 4. 发送消息（使用之前的 Claude 会话 ID）
+        logger.info(f"📤 发送给 Claude Client...")
+        response = self.client.chat(
+            message=formatted_message,
+            session_id=session_id,
+            claude_session_id=session.claude_session_id,
+            config_override=config_override,
+        )
+
+        self._record_chat(session, message, response)
+        return response
+
+    async def achat(
+        self,
+        message: str,
+        user_id: str,
+        session_id: Optional[str] = None,
+        config_override: Optional[ClaudeConfig] = None,
+        metadata: Optional[dict] = None,
+    ) -> ClaudeResponse:
+        """发送消息（异步版本）
+
+        Claude 调用在事件循环中等待，不占用线程。参数与返回值同 chat()。
+        会话存储（Redis/文件）读写和消息格式化是同步操作，放到线程中执行，
+        避免阻塞事件循环。
+        """
+        session_id, session, formatted_message = await asyncio.to_thread(
+            self._prepare_chat, message, user_id, session_id, metadata
+        )
+
+        logger.info(f"📤 发送给 Claude Client...")
+        response = await self.client.achat(
+            message=formatted_message,
+            session_id=session_id,
+            claude_session_id=session.claude_session_id,
+            config_override=config_override,
+        )
+
+        await asyncio.to_thread(self._record_chat, session, message, response)
+        return response
+
+    def _prepare_chat(
+        self,
+        message: str,
+        user_id: str,
+        session_id: Optional[str],
+        metadata: Optional[dict],
+    ):
+        """确定会话、加载会话并格式化消息"""
         # 1. 确定会话 ID
         session_id = session_id or f"user_{user_id}"
 
@@ -70,10 +137,7 @@ class ClaudeAgent:
         logger.info(f"📝 原始消息: {message}")
 
         # 2. 获取或创建会话
-        session = self.session_manager.get_or_create_session(
-            session_id=session_id,
-            user_id=user_id,
-        )
+        session = self._load_session(session_id, user_id)
 
         # 3. 格式化消息（如果提供了格式化器）
         formatted_message = self._format_message(message, user_id, metadata)
@@ -83,31 +147,45 @@ class ClaudeAgent:
         else:
             logger.info("✏️  无需格式化（未配置 formatter 或格式化器返回原文）")
 
-        # 4. 发送消息（使用之前的 Claude 会话 ID）
-        logger.info(f"📤 发送给 Claude Client...")
-        response = self.client.chat(
-            message=formatted_message,
+        return session_id, session, formatted_message
+
+    def _load_session(self, session_id: str, user_id: str) -> SessionData:
+        """获取会话，优先使用内存缓存，未命中时从存储加载"""
+        session = self._session_cache.pop(session_id, None)
+        # 会话可能已过期（TTL）或被删除，此时丢弃缓存，不恢复旧的 Claude 会话
+        if session is not None and self.session_manager.store.exists(session_id):
+            self._session_cache[session_id] = session
+            return session
+
+        session = self.session_manager.get_or_create_session(
             session_id=session_id,
-            claude_session_id=session.claude_session_id,
-            config_override=config_override,
+            user_id=user_id,
         )
-
+        if self.session_cache_size > 0:
+            self._session_cache[session_id] = session
+            if len(self._session_cache) > self.session_cache_size:
+                self._session_cache.popitem(last=False)
+        return session
+
+    def _record_chat(self, session: SessionData, message: str, response: ClaudeResponse) -> None:
+        """更新 Claude 会话 ID 并保存对话历史"""
         # 5. 更新 Claude 会话 ID（用于下次对话）
         new_session_id = response.metadata.get("claude_session_id")
         if new_session_id:
-            self.session_manager.update_claude_session_id(session_id, new_session_id)
+            session.claude_session_id = new_session_id
             logger.debug(f"🔄 更新 Claude Session ID: {new_session_id}")
 
-        # 6. 保存对话历史
-        self.session_manager.add_message(session_id, "user", message)
-        self.session_manager.add_message(session_id, "assistant", response.content)
+        # 6. 保存对话历史（直接修改已加载的会话，只写一次存储）
+        session.conversation_history.append(ClaudeMessage(role="user", content=message))
+        session.conversation_history.append(
+            ClaudeMessage(role="assistant", content=response.content)
+        )
+        self.session_manager.save_session(session)
         logger.info(f"💾 已保存对话历史")
 
         logger.info(f"✅ Agent 处理完成")
         logger.info("=" * 80)
 
-        return response
-
     def get_conversation_history(self, user_id: str, session_id: Optional[str] = None):
         """获取对话历史
         
@@ -129,8 +207,19 @@ class ClaudeAgent:
             session_id: 会话 ID（可选）
         """
         session_id = session_id or f"user_{user_id}"
+
+        # 释放持有该会话上下文的常驻进程
+        self._session_cache.pop(session_id, None)
+        session = self.session_manager.store.get(session_id)
+        if session and session.claude_session_id and self.client.process_pool:
+            self.client.process_pool.release(session.claude_session_id)
+
         self.session_manager.delete_session(session_id)
 
+    def close(self) -> None:
+        """关闭常驻 Claude 进程"""
+        self.client.close_process_pool()
+
     def _format_message(self, message: str, user_id: str, metadata: Optional[dict]) -> str:
         """格式化消息
         
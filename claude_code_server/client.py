@@ -5,23 +5,79 @@ Simple is better than complex.
 """
 
 import asyncio
+import dataclasses
+import functools
+import os
+import shutil
+import subprocess
+import sys
 from pathlib import Path
-from typing import Optional
+from typing import AsyncIterator, Optional
 
 from .exceptions import ClaudeExecutionError, InvalidConfigError
 from .logger import logger
+from .process_pool import ClaudeProcessPool
 from .types import ClaudeConfig, ClaudeResponse
 
 # 尝试导入 Claude Agent SDK
 try:
+    import claude_agent_sdk
     from claude_agent_sdk import ClaudeAgentOptions, query
     SDK_AVAILABLE = True
 except ImportError:
     SDK_AVAILABLE = False
+    claude_agent_sdk = None
     query = None
     ClaudeAgentOptions = None
 
 
+@functools.lru_cache(maxsize=1)
+def _cli_path() -> Optional[str]:
+    """解析 Claude CLI 路径，结果在进程内缓存
+
+    查找顺序与 SDK 一致：优先使用 SDK 自带的 CLI，其次是 PATH 中的 claude。
+    未设置 cli_path 时 SDK 每次启动进程都会重新搜索一遍。
+    """
+    if claude_agent_sdk is not None:
+        cli_name = "claude.exe" if sys.platform == "win32" else "claude"
+        bundled = Path(claude_agent_sdk.__file__).parent / "_bundled" / cli_name
+        if bundled.is_file():
+            return str(bundled)
+    return shutil.which("claude")
+
+
+@functools.lru_cache(maxsize=1)
+def _cli_version() -> str:
+    """运行 `claude --version`，结果在进程内缓存"""
+    claude_path = _cli_path()
+    if claude_path is None:
+        raise ClaudeExecutionError("未找到 Claude CLI（claude 不在 PATH 中）", return_code=-1)
+
+    # 查询版本只需要最小的环境变量
+    env = {key: os.environ[key] for key in ("PATH", "HOME") if key in os.environ}
+    try:
+        result = subprocess.run(
+            [claude_path, "--version"],
+            check=True,
+            capture_output=True,
+            text=True,
+            env=env,
+            timeout=30,
+        )
+    except subprocess.CalledProcessError as e:
+        raise ClaudeExecutionError(
+            f"获取 Claude CLI 版本失败: {e.stderr.strip()}",
+            return_code=e.returncode,
+            stderr=e.stderr,
+        )
+    except subprocess.TimeoutExpired as e:
+        raise ClaudeExecutionError(
+            f"获取 Claude CLI 版本超时（{e.timeout}s）",
+            return_code=-1,
+        )
+    return result.stdout.strip()
+
+
 class ClaudeClient:
     """Claude 客户端 - 使用官方 Agent SDK
     
@@ -42,6 +98,47 @@ class ClaudeClient:
                 "claude-agent-sdk 未安装。请运行：pip install claude-agent-sdk"
             )
         self.config = config or ClaudeConfig()
+        self.process_pool: Optional[ClaudeProcessPool] = None
+        # 默认配置对应的 SDK 选项模板，首次调用时构建，系统提示文件变化时重建
+        self._base_options: Optional[ClaudeAgentOptions] = None
+        self._base_options_key: Optional[tuple] = None
+
+    def get_version(self) -> str:
+        """获取 Claude CLI 版本
+
+        CLI 版本在进程生命周期内不变，只有首次调用会启动子进程，
+        之后所有客户端共享缓存结果。
+        """
+        return _cli_version()
+
+    def start_process_pool(
+        self, size: int, max_processes: Optional[int] = None, idle_timeout: float = 600
+    ) -> ClaudeProcessPool:
+        """启动预热进程池
+
+        之后的 chat() 调用会优先使用池中常驻的 Claude 进程，
+        无法命中时回退到单次 query()。
+
+        Args:
+            size: 保持的空闲进程数量
+            max_processes: 进程总数上限（默认 size 的 4 倍）
+            idle_timeout: 持有会话的进程空闲多久后回收（秒）
+        """
+        if self.process_pool is None:
+            self.process_pool = ClaudeProcessPool(
+                self._build_options(self.config, None),
+                size=size,
+                max_processes=max_processes,
+                idle_timeout=idle_timeout,
+            )
+            self.process_pool.start()
+        return self.process_pool
+
+    def close_process_pool(self) -> None:
+        """关闭预热进程池"""
+        if self.process_pool is not None:
+            self.process_pool.close()
+            self.process_pool = None
 
     def chat(
         self,
@@ -62,18 +159,7 @@ class ClaudeClient:
             ClaudeResponse 包含响应内容和元数据
         """
         config = config_override or self.config
-
-        # 打印调用信息
-        logger.info("=" * 80)
-        logger.info("🚀 调用 Claude Agent SDK")
-        logger.info("=" * 80)
-        logger.info(f"📝 用户 Query: {message}")
-        logger.info(f"🔑 Claude Session ID: {claude_session_id or '新会话'}")
-        logger.info(f"📂 工作目录: {config.working_directory or '当前目录'}")
-
-        # 调试信息（如果启用）
-        if config.debug_print_command:
-            self._print_debug_info(message, claude_session_id, config)
+        self._log_call(message, claude_session_id, config)
 
         try:
             # 1. 构建选项
@@ -82,68 +168,218 @@ class ClaudeClient:
 
             # 2. 调用 SDK（异步转同步）
             logger.info("⏳ 等待 Claude 响应...")
-            messages = self._run_query(message, options)
+            messages = None
+            if self.process_pool is not None and config_override is None:
+                messages = self.process_pool.run(message, claude_session_id, config.timeout)
+            if messages is None:
+                messages = self._run_query(message, options)
 
             # 3. 解析响应
-            response = self._parse_response(messages)
-            logger.info(f"✅ Claude 响应完成，内容长度: {len(response.content)} 字符")
-            logger.info("=" * 80)
+            return self._finish_call(messages)
 
-            return response
+        except Exception as e:
+            raise self._execution_error(e)
+
+    async def achat(
+        self,
+        message: str,
+        session_id: Optional[str] = None,
+        claude_session_id: Optional[str] = None,
+        config_override: Optional[ClaudeConfig] = None,
+    ) -> ClaudeResponse:
+        """发送消息给 Claude（异步版本）
+
+        直接在当前事件循环中等待 SDK，不占用线程。
+        参数与返回值同 chat()。
+        """
+        config = config_override or self.config
+        self._log_call(message, claude_session_id, config)
+
+        try:
+            options = self._build_options(config, claude_session_id)
+            logger.info(f"⚙️  配置选项: model={options.model}, timeout={config.timeout}s")
+
+            logger.info("⏳ 等待 Claude 响应...")
+            messages = None
+            if self.process_pool is not None and config_override is None:
+                messages = await self.process_pool.arun(
+                    message, claude_session_id, config.timeout
+                )
+            if messages is None:
+                messages = await self._collect_messages(message, options)
+
+            return self._finish_call(messages)
 
         except Exception as e:
-            logger.error(f"❌ Claude Agent SDK 执行失败: {str(e)}")
-            logger.info("=" * 80)
-            raise ClaudeExecutionError(
-                f"Claude Agent SDK 执行失败: {str(e)}",
-                return_code=-1,
+            raise self._execution_error(e)
+
+    async def chat_many(
+        self,
+        messages: list[str],
+        config_override: Optional[ClaudeConfig] = None,
+    ) -> list[ClaudeResponse]:
+        """并发发送多条互不相关的消息
+
+        每条消息都是独立的新会话，CLI 进程同时启动，
+        总耗时约等于最慢的一次调用而不是所有调用之和。
+
+        Args:
+            messages: 要发送的消息列表
+            config_override: 覆盖默认配置
+
+        Returns:
+            与 messages 顺序一致的 ClaudeResponse 列表
+        """
+        return list(
+            await asyncio.gather(
+                *(self.achat(message, config_override=config_override) for message in messages)
             )
+        )
+
+    async def achat_stream(
+        self,
+        message: str,
+        claude_session_id: Optional[str] = None,
+        config_override: Optional[ClaudeConfig] = None,
+    ) -> AsyncIterator[str]:
+        """流式发送消息，逐段返回回复文本
+
+        SDK 每解析出一条 AssistantMessage 就立即产出其中的文本，
+        调用方无需等待完整回复，也不必在内存中保留全部消息。
+        流式调用不经过进程池。
+
+        Args:
+            message: 要发送的消息
+            claude_session_id: Claude SDK 的会话 ID（用于恢复对话）
+            config_override: 覆盖默认配置
+
+        Yields:
+            回复文本片段
+        """
+        config = config_override or self.config
+        self._log_call(message, claude_session_id, config)
+
+        try:
+            options = self._build_options(config, claude_session_id)
+            count = 0
+            async for msg in query(prompt=message, options=options):
+                count += 1
+                self._log_agent_message(msg, count)
+                if type(msg).__name__ != "AssistantMessage":
+                    continue
+                for block in msg.content:
+                    if hasattr(block, "text"):  # TextBlock
+                        yield block.text
+                    elif isinstance(block, str):
+                        yield block
+        except Exception as e:
+            raise self._execution_error(e)
+
+        logger.info(f"✅ Claude 流式响应完成，共 {count} 条 Agent 消息")
+        logger.info("=" * 80)
+
+    def _log_call(
+        self, message: str, claude_session_id: Optional[str], config: ClaudeConfig
+    ) -> None:
+        """打印调用信息"""
+        logger.info("=" * 80)
+        logger.info("🚀 调用 Claude Agent SDK")
+        logger.info("=" * 80)
+        logger.info(f"📝 用户 Query: {message}")
+        logger.info(f"🔑 Claude Session ID: {claude_session_id or '新会话'}")
+        logger.info(f"📂 工作目录: {config.working_directory or '当前目录'}")
+
+        # 调试信息（如果启用）
+        if config.debug_print_command:
+            self._print_debug_info(message, claude_session_id, config)
+
+    def _finish_call(self, messages: list) -> ClaudeResponse:
+        """解析响应并打印结果"""
+        response = self._parse_response(messages)
+        logger.info(f"✅ Claude 响应完成，内容长度: {len(response.content)} 字符")
+        logger.info("=" * 80)
+        return response
+
+    def _execution_error(self, e: Exception) -> ClaudeExecutionError:
+        """记录失败并转换为 ClaudeExecutionError"""
+        logger.error(f"❌ Claude Agent SDK 执行失败: {str(e)}")
+        logger.info("=" * 80)
+        return ClaudeExecutionError(
+            f"Claude Agent SDK 执行失败: {str(e)}",
+            return_code=-1,
+        )
+
+    async def _collect_messages(self, message: str, options: ClaudeAgentOptions) -> list:
+        """收集 SDK 返回的所有消息"""
+        messages = []
+        async for msg in query(prompt=message, options=options):
+            logger.info(f"🔍 收到消息: {msg}")
+            messages.append(msg)
+        return messages
 
     def _run_query(self, message: str, options: ClaudeAgentOptions) -> list:
         """运行异步查询（同步方式）
 
         SDK 的 query 是异步生成器，这里转换为同步调用。
         """
-        async def collect_messages():
-            """收集所有消息"""
-            messages = []
-            message_count = 0
-            async for msg in query(prompt=message, options=options):
-                logger.info(f"🔍 收到消息: {msg}")
-                # message_count += 1
-                # msg_type = type(msg).__name__
-                # logger.debug(f"📨 SDK 消息 #{message_count}: {msg_type}")
-                #
-                # # 详细打印消息内容
-                # if msg_type == 'AssistantMessage' and hasattr(msg, 'content'):
-                #     for block in msg.content:
-                #         if hasattr(block, 'text'):
-                #             text_preview = block.text[:200] if len(block.text) > 200 else block.text
-                #             logger.debug(f"   💬 内容预览: {text_preview}...")
-                #         elif isinstance(block, str):
-                #             text_preview = block[:200] if len(block) > 200 else block
-                #             logger.debug(f"   💬 内容预览: {text_preview}...")
-
-                messages.append(msg)
-            return messages
-        
         # 获取或创建事件循环
         try:
             loop = asyncio.get_event_loop()
         except RuntimeError:
             loop = asyncio.new_event_loop()
             asyncio.set_event_loop(loop)
-        
-        return loop.run_until_complete(collect_messages())
+
+        return loop.run_until_complete(self._collect_messages(message, options))
 
     def _build_options(
-        self, 
-        config: ClaudeConfig, 
+        self,
+        config: ClaudeConfig,
         session_id: Optional[str]
     ) -> ClaudeAgentOptions:
         """构建 SDK 选项
-        
-        将我们的 ClaudeConfig 转换为 SDK 所需的 ClaudeAgentOptions。
+
+        默认配置的选项会缓存下来，之后每次调用只替换 resume；
+        CLAUDE.md 等系统提示文件的修改时间变化时重新构建。
+        config_override 的选项每次重新构建。
+        """
+        if config is self.config:
+            key = self._prompt_files_key(config)
+            if self._base_options is None or key != self._base_options_key:
+                self._base_options = self._compile_options(config)
+                self._base_options_key = key
+            base = self._base_options
+        else:
+            base = self._compile_options(config)
+
+        # 恢复会话（SDK 使用 'resume'）；复制一份，列表和字典字段也复制，模板本身不被修改
+        copies = {
+            field.name: value.copy()
+            for field in dataclasses.fields(base)
+            if isinstance(value := getattr(base, field.name), (list, dict))
+        }
+        return dataclasses.replace(base, resume=session_id, **copies)
+
+    def _prompt_files_key(self, config: ClaudeConfig) -> tuple:
+        """系统提示文件的修改时间，用于判断缓存的选项是否过期"""
+        if not config.working_directory:
+            return ()
+
+        working_dir = Path(config.working_directory)
+        key = []
+        for path in [
+            working_dir / ".claude" / "CLAUDE.md",
+            working_dir / "CLAUDE.md",
+            working_dir / "SYSTEM_PROMPT.md",
+        ]:
+            try:
+                key.append(path.stat().st_mtime_ns)
+            except OSError:
+                key.append(None)
+        return tuple(key)
+
+    def _compile_options(self, config: ClaudeConfig) -> ClaudeAgentOptions:
+        """将 ClaudeConfig 转换为 SDK 所需的 ClaudeAgentOptions（不含会话）
+
         注意：SDK 使用不同的参数名（如 cwd 而不是 working_directory）
         """
         options = {}
@@ -169,12 +405,13 @@ class ClaudeClient:
         if config.allowed_tools:
             options["allowed_tools"] = config.allowed_tools
         
-        # 恢复会话（SDK 使用 'resume'）
-        if session_id:
-            options["resume"] = session_id
-        
         # 设置来源（加载用户/项目/本地配置）
         options["setting_sources"] = ["user", "project", "local"]
+
+        # CLI 路径只解析一次，避免 SDK 每次启动进程都重新搜索
+        cli_path = _cli_path()
+        if cli_path:
+            options["cli_path"] = cli_path
         
         return ClaudeAgentOptions(**options)
 
@@ -257,7 +494,7 @@ class ClaudeClient:
             },
         )
     
-    def _log_agent_message(self, msg, index: int, total: int):
+    def _log_agent_message(self, msg, index: int, total: Optional[int] = None):
         """打印 Agent 消息（格式化、易读）
         
         专门用于记录 Claude Agent SDK 返回的消息，
@@ -266,12 +503,13 @@ class ClaudeClient:
         Args:
             msg: Agent 消息对象
             index: 消息序号（从1开始）
-            total: 消息总数
+            total: 消息总数（流式调用时未知，传 None）
         """
         msg_type = type(msg).__name__
         
         # 消息头部
-        logger.info(f"┌─ 消息 [{index}/{total}] - {msg_type}")
+        position = f"{index}/{total}" if total else str(index)
+        logger.info(f"┌─ 消息 [{position}] - {msg_type}")
         
         # SystemMessage: 系统初始化
         if msg_type == 'SystemMessage':
@@ -0,0 +1,337 @@
+"""Claude 进程池 - 预热的 CLI 子进程
+
+每次 query() 都会启动一个新的 Claude CLI 进程（Node.js 冷启动约 200-400ms）。
+进程池提前启动若干个常驻的 ClaudeSDKClient 连接，请求直接复用空闲进程。
+Now is better than never.
+"""
+
+import asyncio
+import concurrent.futures
+import threading
+from collections import OrderedDict, deque
+from typing import Deque, Optional
+
+from .logger import logger
+
+try:
+    from claude_agent_sdk import ClaudeAgentOptions, ClaudeSDKClient
+
+    SDK_AVAILABLE = True
+except ImportError:
+    SDK_AVAILABLE = False
+    ClaudeAgentOptions = None
+    ClaudeSDKClient = None
+
+# 进程启动失败后的重试间隔（秒），按 1, 2, 4... 倍递增，不超过上限
+_RETRY_BASE_DELAY = 1
+_MAX_RETRY_DELAY = 60
+
+
+class _Worker:
+    """一个常驻的 Claude CLI 进程"""
+
+    def __init__(self, worker_id: int):
+        self.worker_id = worker_id
+        self.inbox: asyncio.Queue = asyncio.Queue()
+        self.claude_session_id: Optional[str] = None
+        self.served = 0
+        self.busy = False
+        self.closed = False
+        self.last_used = 0.0
+        # 进程连接完成（或启动失败）时置位
+        self.started = asyncio.Event()
+
+
+class ClaudeProcessPool:
+    """Claude CLI 进程池
+
+    进程会保留自己的对话上下文，因此：
+    - 新会话（无 claude_session_id）使用空闲进程
+    - 后续对话路由回持有该会话的进程
+    - 无法命中的请求返回 None，由调用方回退到单次 query()
+
+    空闲进程被会话占用后会补充新的空闲进程，进程总数不超过 max_processes。
+    请求路径上不会关闭任何进程；持有会话的进程空闲超过 idle_timeout 后才会被回收。
+
+    池在独立线程的事件循环中运行，可以在任意线程中同步调用：
+        >>> pool = ClaudeProcessPool(options, size=4)
+        >>> pool.start()
+        >>> messages = pool.run("你好", claude_session_id=None, timeout=300)
+        >>> pool.close()
+    """
+
+    def __init__(
+        self,
+        options: "ClaudeAgentOptions",
+        size: int = 4,
+        warmup_timeout: float = 60,
+        max_processes: Optional[int] = None,
+        idle_timeout: float = 600,
+    ):
+        """初始化进程池
+
+        Args:
+            options: 所有进程共用的 SDK 选项（不应包含 resume）
+            size: 保持的空闲进程数量
+            warmup_timeout: start() 等待进程就绪的最长时间（秒）
+            max_processes: 进程总数上限（默认 size 的 4 倍）
+            idle_timeout: 持有会话的进程空闲多久后回收（秒）
+        """
+        self.options = options
+        self.size = size
+        self.warmup_timeout = warmup_timeout
+        self.max_processes = max_processes or size * 4
+        self.idle_timeout = idle_timeout
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._idle: Deque[_Worker] = deque()
+        self._bound: "OrderedDict[str, _Worker]" = OrderedDict()
+        self._worker_tasks: set[asyncio.Task] = set()
+        self._next_worker_id = 0
+        self._starting = 0
+        self._failures = 0
+        self._retry_handle: Optional[asyncio.TimerHandle] = None
+        self._reaper: Optional[asyncio.Task] = None
+        self._closing = False
+
+    def start(self) -> None:
+        """启动事件循环线程并预热所有进程"""
+        if self._loop is not None:
+            return
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name="claude-process-pool", daemon=True
+        )
+        self._thread.start()
+
+        asyncio.run_coroutine_threadsafe(self._start_workers(), self._loop).result()
+        logger.info(f"🔥 Claude 进程池已启动，预热进程数: {self.size}")
+
+    def run(self, prompt: str, claude_session_id: Optional[str], timeout: float) -> Optional[list]:
+        """使用池中的进程发送消息
+
+        Args:
+            prompt: 消息内容
+            claude_session_id: 要继续的 Claude 会话 ID（新会话为 None）
+            timeout: 等待响应的超时时间（秒）
+
+        Returns:
+            SDK 消息列表；池无法处理该请求时返回 None
+        """
+        if self._loop is None or self._closing:
+            return None
+
+        future = asyncio.run_coroutine_threadsafe(
+            self._dispatch(prompt, claude_session_id), self._loop
+        )
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            # 取消尚未执行的任务，不让它继续占用进程
+            future.cancel()
+            raise
+
+    async def arun(
+        self, prompt: str, claude_session_id: Optional[str], timeout: float
+    ) -> Optional[list]:
+        """run() 的异步版本，在调用方的事件循环中等待结果
+
+        超时后 wait_for 会取消包装的 future，取消会传递到池的事件循环。
+        """
+        if self._loop is None or self._closing:
+            return None
+
+        future = asyncio.run_coroutine_threadsafe(
+            self._dispatch(prompt, claude_session_id), self._loop
+        )
+        return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+
+    def release(self, claude_session_id: str) -> None:
+        """释放持有该会话的进程
+
+        会话被清除后其上下文不再需要，进程退出后由新的空闲进程替换。
+        """
+        if self._loop is None or self._closing:
+            return
+        self._loop.call_soon_threadsafe(self._release, claude_session_id)
+
+    def close(self) -> None:
+        """关闭所有进程并停止事件循环"""
+        if self._loop is None:
+            return
+
+        self._closing = True
+        asyncio.run_coroutine_threadsafe(self._stop_workers(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._loop = None
+        logger.info("👋 Claude 进程池已关闭")
+
+    async def _start_workers(self) -> None:
+        workers = [self._spawn_worker() for _ in range(self.size)]
+        self._reaper = asyncio.create_task(self._reap_idle())
+
+        # 等待进程完成连接，否则刚启动时的请求找不到空闲进程，只能回退到 query()
+        waits = [asyncio.create_task(worker.started.wait()) for worker in workers]
+        _, pending = await asyncio.wait(waits, timeout=self.warmup_timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            logger.warning(f"⚠️  {len(pending)} 个 Claude 进程在 {self.warmup_timeout}s 内未就绪")
+
+    async def _stop_workers(self) -> None:
+        if self._retry_handle is not None:
+            self._retry_handle.cancel()
+        if self._reaper is not None:
+            self._reaper.cancel()
+        for task in list(self._worker_tasks):
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._bound.clear()
+        self._idle.clear()
+
+    def _spawn_worker(self) -> _Worker:
+        worker = _Worker(self._next_worker_id)
+        self._next_worker_id += 1
+        self._starting += 1
+        task = asyncio.create_task(self._run_worker(worker))
+        self._worker_tasks.add(task)
+        task.add_done_callback(self._worker_tasks.discard)
+        return worker
+
+    def _mark_started(self, worker: _Worker) -> None:
+        if not worker.started.is_set():
+            worker.started.set()
+            self._starting -= 1
+
+    def _replenish(self) -> None:
+        """补充空闲进程，直到有 size 个空闲（或正在启动）的进程"""
+        if self._closing or self._retry_handle is not None:
+            return
+        spare = self._starting + sum(1 for worker in self._idle if not worker.closed)
+        while spare < self.size and len(self._worker_tasks) < self.max_processes:
+            self._spawn_worker()
+            spare += 1
+
+    def _retry_replenish(self) -> None:
+        self._retry_handle = None
+        self._replenish()
+
+    async def _dispatch(self, prompt: str, claude_session_id: Optional[str]) -> Optional[list]:
+        worker = self._acquire(claude_session_id)
+        if worker is None:
+            return None
+
+        future = asyncio.get_running_loop().create_future()
+        worker.inbox.put_nowait((prompt, future))
+        return await future
+
+    def _release(self, claude_session_id: str) -> None:
+        worker = self._bound.pop(claude_session_id, None)
+        if worker is not None:
+            worker.inbox.put_nowait(None)
+
+    def _acquire(self, claude_session_id: Optional[str]) -> Optional[_Worker]:
+        if claude_session_id:
+            worker = self._bound.get(claude_session_id)
+            if worker is not None and not worker.closed:
+                self._bound.move_to_end(claude_session_id)
+                return worker
+            return None
+
+        while self._idle:
+            worker = self._idle.popleft()
+            if not worker.closed:
+                # 这个进程即将被新会话占用，提前补充空闲进程
+                self._replenish()
+                return worker
+        return None
+
+    async def _reap_idle(self) -> None:
+        """定期回收长时间空闲的会话进程"""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(min(self.idle_timeout, 30))
+            now = loop.time()
+            for session_id, worker in list(self._bound.items()):
+                if not worker.busy and now - worker.last_used > self.idle_timeout:
+                    del self._bound[session_id]
+                    worker.inbox.put_nowait(None)
+
+    def _finish_job(self, worker: _Worker, messages: list) -> None:
+        """记录进程持有的会话，之后的请求路由回同一进程"""
+        for msg in messages:
+            session_id = getattr(msg, "session_id", None)
+            if session_id:
+                worker.claude_session_id = session_id
+
+        if worker.claude_session_id:
+            self._bound[worker.claude_session_id] = worker
+            self._bound.move_to_end(worker.claude_session_id)
+        elif worker not in self._idle:
+            self._idle.append(worker)
+
+    async def _run_worker(self, worker: _Worker) -> None:
+        loop = asyncio.get_running_loop()
+        connected = False
+        try:
+            async with ClaudeSDKClient(options=self.options) as sdk:
+                connected = True
+                self._failures = 0
+                worker.last_used = loop.time()
+                self._idle.append(worker)
+                self._mark_started(worker)
+                while True:
+                    job = await worker.inbox.get()
+                    if job is None:
+                        break
+
+                    prompt, future = job
+                    if future.done():
+                        continue  # 调用方已超时取消
+
+                    worker.busy = True
+                    try:
+                        await sdk.query(prompt)
+                        messages = [msg async for msg in sdk.receive_response()]
+                    except Exception as e:
+                        if not future.done():
+                            future.set_exception(e)
+                        break
+                    finally:
+                        worker.busy = False
+                        worker.last_used = loop.time()
+
+                    worker.served += 1
+                    self._finish_job(worker, messages)
+                    if not future.done():
+                        future.set_result(messages)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"❌ Claude 进程 #{worker.worker_id} 异常退出: {type(e).__name__}: {e}")
+        finally:
+            worker.closed = True
+            self._mark_started(worker)
+            if worker in self._idle:
+                self._idle.remove(worker)
+            if worker.claude_session_id and self._bound.get(worker.claude_session_id) is worker:
+                del self._bound[worker.claude_session_id]
+            while not worker.inbox.empty():
+                job = worker.inbox.get_nowait()
+                if job is not None and not job[1].done():
+                    job[1].set_exception(RuntimeError("Claude 进程已退出"))
+
+            if not self._closing:
+                if connected:
+                    # 任务结束后才从 _worker_tasks 中移除，延后补充以免计入自己
+                    loop.call_soon(self._replenish)
+                else:
+                    # 启动失败：按指数退避重试，避免 CLI 不可用时频繁重启
+                    self._failures += 1
+                    delay = min(_RETRY_BASE_DELAY * 2 ** (self._failures - 1), _MAX_RETRY_DELAY)
+                    logger.warning(f"⚠️  Claude 进程启动失败，{delay}s 后重试")
+                    if self._retry_handle is None:
+                        self._retry_handle = loop.call_later(delay, self._retry_replenish)
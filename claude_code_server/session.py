@@ -8,7 +8,18 @@ from datetime import datetime
 import json
 
 from .types import SessionData, ClaudeMessage
-from .exceptions import SessionNotFoundError
+from .exceptions import InvalidConfigError, SessionNotFoundError
+
+try:
+    import msgpack
+
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+    msgpack = None
+
+# Leading byte of msgpack-encoded sessions (JSON documents always start with '{')
+_MSGPACK_V1 = b"\x01"
 
 
 class SessionStore(Protocol):
@@ -58,7 +69,13 @@ class InMemorySessionStore:
 class RedisSessionStore:
     """Redis-based session storage (for production)."""
 
-    def __init__(self, redis_client, prefix: str = "claude_session:", ttl: Optional[int] = None):
+    def __init__(
+        self,
+        redis_client,
+        prefix: str = "claude_session:",
+        ttl: Optional[int] = None,
+        serializer: str = "json",
+    ):
         """
         Initialize Redis session store.
 
@@ -68,10 +85,18 @@ class RedisSessionStore:
             ttl: Time-to-live in seconds (default: None, never expire)
                  Set to None for sessions that never expire
                  Set to a number (e.g., 3600) for sessions that expire after that many seconds
+            serializer: Format for new writes, "json" or "msgpack" (requires msgpack and a
+                 client with decode_responses=False). Reads accept either format.
         """
+        if serializer not in ("json", "msgpack"):
+            raise InvalidConfigError(f"Unknown session serializer: {serializer}")
+        if serializer == "msgpack" and not MSGPACK_AVAILABLE:
+            raise InvalidConfigError("msgpack serializer requires: pip install msgpack")
+
         self.redis = redis_client
         self.prefix = prefix
         self.ttl = ttl
+        self.serializer = serializer
 
     def _make_key(self, session_id: str) -> str:
         return f"{self.prefix}{session_id}"
@@ -79,14 +104,21 @@ class RedisSessionStore:
     def get(self, session_id: str) -> Optional[SessionData]:
         key = self._make_key(session_id)
         data = self.redis.get(key)
-        if data:
-            return SessionData.model_validate_json(data)
-        return None
+        if not data:
+            return None
+        if isinstance(data, bytes) and data[:1] == _MSGPACK_V1:
+            if not MSGPACK_AVAILABLE:
+                raise InvalidConfigError("Session was stored as msgpack: pip install msgpack")
+            return SessionData.model_validate(msgpack.unpackb(data[1:], raw=False))
+        return SessionData.model_validate_json(data)
 
     def save(self, session: SessionData) -> None:
         session.last_activity = datetime.now()
         key = self._make_key(session.session_id)
-        data = session.model_dump_json()
+        if self.serializer == "msgpack":
+            data = _MSGPACK_V1 + msgpack.packb(session.model_dump(mode="json"), use_bin_type=True)
+        else:
+            data = session.model_dump_json()
 
         if self.ttl is None:
             # No expiration - session never expires
@@ -207,6 +239,37 @@ class SessionManager:
         self.store.save(session)
         return session
 
+    def add_messages(
+        self,
+        session_id: str,
+        messages: list[tuple[str, str]],
+    ) -> SessionData:
+        """
+        Add several messages to session history with a single load and save.
+
+        Args:
+            session_id: Session identifier
+            messages: (role, content) pairs, appended in order
+
+        Returns:
+            Updated SessionData object
+        """
+        session = self.get_session(session_id)
+        session.conversation_history.extend(
+            ClaudeMessage(role=role, content=content) for role, content in messages  # type: ignore
+        )
+        self.store.save(session)
+        return session
+
+    def save_session(self, session: SessionData) -> None:
+        """
+        Save a session that was loaded and modified by the caller.
+
+        Args:
+            session: SessionData object to persist
+        """
+        self.store.save(session)
+
     def update_claude_session_id(
         self,
         session_id: str,
@@ -73,8 +73,9 @@ class SimpleAgent:
         )
         
         # 保存历史
-        self.session_manager.add_message(session_id, "user", message)
-        self.session_manager.add_message(session_id, "assistant", response.content)
+        self.session_manager.add_messages(
+            session_id, [("user", message), ("assistant", response.content)]
+        )
         
         return response
 
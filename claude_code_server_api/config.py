@@ -76,6 +76,7 @@ class ServerConfig(BaseModel):
     session_storage_dir: str = ".sessions"  # 文件存储目录
     redis_url: Optional[str] = "redis://localhost:6379"
     session_ttl: Optional[int] = None  # Session TTL in seconds (None = never expire)
+    session_serializer: str = "json"  # Redis payload format: json or msgpack (smaller, faster)
 
     # Security (optional)
     api_key: Optional[str] = None  # If set, require X-API-Key header
@@ -84,6 +85,9 @@ class ServerConfig(BaseModel):
     # Task queue settings (for async mode)
     max_concurrent_tasks: int = 10
     task_timeout: int = 600
+    max_queued_tasks: int = 100  # Tasks waiting for a worker; beyond this /chat/async returns 429
+    max_stored_tasks: int = 10000  # Oldest task results are evicted beyond this
+    enable_process_pool: bool = False  # Keep max_concurrent_tasks warm Claude processes
 
     # Message debouncing settings (for async mode)
     enable_message_debouncing: bool = True  # Enable automatic message combining
@@ -44,16 +44,23 @@ class MessageBuffer:
         )
     """
 
-    def __init__(self, default_window: float = 2.0, message_separator: str = "\n"):
+    def __init__(
+        self,
+        default_window: float = 2.0,
+        message_separator: str = "\n",
+        log_tracebacks: bool = False,
+    ):
         """
         Initialize message buffer.
 
         Args:
             default_window: Default debounce window in seconds
             message_separator: String to join messages when combining
+            log_tracebacks: Include full tracebacks when a callback fails
         """
         self.default_window = default_window
         self.message_separator = message_separator
+        self.log_tracebacks = log_tracebacks
         self.buffers: Dict[str, BufferState] = {}
         self._lock = asyncio.Lock()
 
@@ -177,9 +184,13 @@ class MessageBuffer:
             await callback(combined_message)
             logger.debug(f"✅ Callback completed for session {session_id}")
         except Exception as e:
-            logger.error(
-                f"❌ Error in callback for session {session_id}: {e}", exc_info=True
-            )
+            if self.log_tracebacks:
+                logger.exception(f"❌ Error in callback for session {session_id}: {e}")
+            else:
+                logger.error(
+                    f"❌ Error in callback for session {session_id}: "
+                    f"{type(e).__name__}: {e}"
+                )
         finally:
             # Mark as not processing
             async with self._lock:
@@ -238,3 +249,17 @@ class MessageBuffer:
                     state.timer_task.cancel()
                 del self.buffers[session_id]
                 logger.debug(f"🧹 Cleaned up buffer for session {session_id}")
+
+    async def close(self):
+        """Cancel every pending debounce timer and drop all buffered messages."""
+        async with self._lock:
+            timers = [
+                state.timer_task
+                for state in self.buffers.values()
+                if state.timer_task and not state.timer_task.done()
+            ]
+            for timer in timers:
+                timer.cancel()
+            self.buffers.clear()
+
+        await asyncio.gather(*timers, return_exceptions=True)
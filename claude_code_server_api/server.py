@@ -37,12 +37,35 @@ task_manager: Optional[TaskManager] = None
 message_buffer: Optional[MessageBuffer] = None
 agent: Optional[ClaudeAgent] = None
 config: Optional[ServerConfig] = None
+# Caps concurrent /chat and /chat/stream calls (each spawns a Claude CLI process)
+chat_slots: Optional[asyncio.Semaphore] = None
+
+
+def _log_endpoint_error(label: str, e: Exception) -> None:
+    """Log an endpoint error; full traceback only when debug output is enabled."""
+    if config is not None and config.debug_print_command:
+        logger.exception(f"❌ {label} 端点错误: {e}")
+    else:
+        logger.error(f"❌ {label} 端点错误: {type(e).__name__}: {e}")
+
+
+def _log_chat_request(endpoint: str, default_mode: str, request: ChatRequest) -> None:
+    """Log the incoming chat request banner shared by the /chat* endpoints."""
+    logger.info("=" * 80)
+    logger.info(f"📨 收到 {endpoint} 请求 ({default_mode} mode)")
+    logger.info("=" * 80)
+    logger.info(f"👤 User ID: {request.user_id}")
+    logger.info(f"🔑 Session ID: {request.session_id or f'user_{request.user_id}' + ' (默认)'}")
+    logger.info(f"📝 Message: {request.message}")
+    logger.info(f"📏 Message Length: {len(request.message)} 字符")
+    logger.info(f"⚙️  Response Mode: {request.response_mode or f'{default_mode} (默认)'}")
+    logger.info(f"⏱️  Timeout: {request.timeout or config.default_timeout} 秒")
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Startup and shutdown events."""
-    global task_manager, message_buffer, agent, config
+    global task_manager, message_buffer, agent, config, chat_slots
 
     # Startup
     logger.info("🚀 启动 Claude Code Server API")
@@ -50,12 +73,20 @@ async def lifespan(app: FastAPI):
     logger.info(f"   Claude 二进制: {config.claude_bin}")
 
     # Initialize task manager
-    task_manager = TaskManager(max_workers=config.max_concurrent_tasks)
+    task_manager = TaskManager(
+        max_workers=config.max_concurrent_tasks,
+        max_queue_size=config.max_queued_tasks,
+        max_tasks=config.max_stored_tasks,
+    )
+
+    # Sync chat endpoints share the task workers' concurrency limit
+    chat_slots = asyncio.Semaphore(config.max_concurrent_tasks)
 
     # Initialize message buffer
     message_buffer = MessageBuffer(
         default_window=config.debounce_window,
         message_separator=config.message_separator,
+        log_tracebacks=config.debug_print_command,
     )
     if config.enable_message_debouncing:
         logger.info(
@@ -63,12 +94,13 @@ async def lifespan(app: FastAPI):
         )
 
     # Start background task cleanup
-    async def cleanup_tasks():
-        while True:
-            await asyncio.sleep(300)  # Every 5 minutes
-            await task_manager.cleanup_old_tasks()
+    cleanup_task = asyncio.create_task(task_manager.cleanup_loop())
 
-    asyncio.create_task(cleanup_tasks())
+    # Pre-spawn warm Claude processes (one per concurrent task slot)
+    if config.enable_process_pool:
+        await asyncio.get_running_loop().run_in_executor(
+            None, agent.client.start_process_pool, config.max_concurrent_tasks
+        )
 
     logger.success("✅ 服务器就绪")
 
@@ -76,6 +108,9 @@ async def lifespan(app: FastAPI):
 
     # Shutdown
     logger.info("👋 关闭服务器...")
+    cleanup_task.cancel()
+    await task_manager.shutdown(timeout=config.task_timeout)
+    agent.close()
 
 
 def create_app(server_config: ServerConfig) -> FastAPI:
@@ -119,7 +154,9 @@ def create_app(server_config: ServerConfig) -> FastAPI:
 
             redis_client = redis.from_url(server_config.redis_url)
             session_store = RedisSessionStore(
-                redis_client, ttl=server_config.session_ttl
+                redis_client,
+                ttl=server_config.session_ttl,
+                serializer=server_config.session_serializer,
             )
         except ImportError:
             raise RuntimeError(
@@ -136,6 +173,8 @@ def create_app(server_config: ServerConfig) -> FastAPI:
         config=claude_config,
         session_store=session_store,
         message_formatter=message_formatter,
+        # Multiple workers share the store, so a per-process cache would go stale
+        session_cache_size=1024 if server_config.workers == 1 else 0,
     )
 
     # Create FastAPI app
@@ -174,7 +213,8 @@ def create_app(server_config: ServerConfig) -> FastAPI:
         """Health check endpoint."""
         claude_version = None
         try:
-            claude_version = agent.client.get_version()
+            # Cached after the first call; keep the initial subprocess off the loop
+            claude_version = await asyncio.to_thread(agent.client.get_version)
         except:
             pass
 
@@ -196,15 +236,7 @@ def create_app(server_config: ServerConfig) -> FastAPI:
         Returns complete response once ready.
         """
         # 打印请求日志
-        logger.info("=" * 80)
-        logger.info("📨 收到 /chat 请求 (sync mode)")
-        logger.info("=" * 80)
-        logger.info(f"👤 User ID: {request.user_id}")
-        logger.info(f"🔑 Session ID: {request.session_id or f'user_{request.user_id}' + ' (默认)'}")
-        logger.info(f"📝 Message: {request.message}")
-        logger.info(f"📏 Message Length: {len(request.message)} 字符")
-        logger.info(f"⚙️  Response Mode: {request.response_mode or 'sync (默认)'}")
-        logger.info(f"⏱️  Timeout: {request.timeout or config.default_timeout} 秒")
+        _log_chat_request("/chat", "sync", request)
         if request.enable_debounce is not None:
             logger.info(f"🔄 Debounce: {request.enable_debounce}")
         if request.debounce_window is not None:
@@ -212,12 +244,10 @@ def create_app(server_config: ServerConfig) -> FastAPI:
         logger.info("=" * 80)
 
         try:
-            response = await asyncio.get_event_loop().run_in_executor(
-                None,
-                lambda: agent.chat(
+            async with chat_slots:
+                response = await agent.achat(
                     request.message, request.user_id, request.session_id
-                ),
-            )
+                )
 
             return ChatResponse(
                 content=response.content,
@@ -227,7 +257,7 @@ def create_app(server_config: ServerConfig) -> FastAPI:
                 metadata=response.metadata,
             )
         except Exception as e:
-            logger.error(f"❌ /chat 端点错误: {str(e)}", exc_info=True)
+            _log_endpoint_error("/chat", e)
             raise HTTPException(status_code=500, detail=str(e))
 
     @app.post(
@@ -241,27 +271,17 @@ def create_app(server_config: ServerConfig) -> FastAPI:
         Returns SSE stream of response chunks.
         """
         # 打印请求日志
-        logger.info("=" * 80)
-        logger.info("📨 收到 /chat/stream 请求 (stream mode)")
-        logger.info("=" * 80)
-        logger.info(f"👤 User ID: {request.user_id}")
-        logger.info(f"🔑 Session ID: {request.session_id or f'user_{request.user_id}' + ' (默认)'}")
-        logger.info(f"📝 Message: {request.message}")
-        logger.info(f"📏 Message Length: {len(request.message)} 字符")
-        logger.info(f"⚙️  Response Mode: {request.response_mode or 'stream (默认)'}")
-        logger.info(f"⏱️  Timeout: {request.timeout or config.default_timeout} 秒")
+        _log_chat_request("/chat/stream", "stream", request)
         logger.info("=" * 80)
 
         async def event_generator():
             try:
                 # Note: Claude CLI doesn't support true streaming yet
                 # We'll simulate by sending the full response as one chunk
-                response = await asyncio.get_event_loop().run_in_executor(
-                    None,
-                    lambda: agent.chat(
+                async with chat_slots:
+                    response = await agent.achat(
                         request.message, request.user_id, request.session_id
-                    ),
-                )
+                    )
 
                 # Send as SSE events
                 yield {
@@ -279,7 +299,7 @@ def create_app(server_config: ServerConfig) -> FastAPI:
                 }
 
             except Exception as e:
-                logger.error(f"❌ /chat/stream 端点错误: {str(e)}", exc_info=True)
+                _log_endpoint_error("/chat/stream", e)
                 yield {
                     "event": "error",
                     "data": {"error": str(e)},
@@ -302,15 +322,7 @@ def create_app(server_config: ServerConfig) -> FastAPI:
         window will be automatically combined before processing.
         """
         # 打印请求日志
-        logger.info("=" * 80)
-        logger.info("📨 收到 /chat/async 请求 (async mode)")
-        logger.info("=" * 80)
-        logger.info(f"👤 User ID: {request.user_id}")
-        logger.info(f"🔑 Session ID: {request.session_id or f'user_{request.user_id}' + ' (默认)'}")
-        logger.info(f"📝 Message: {request.message}")
-        logger.info(f"📏 Message Length: {len(request.message)} 字符")
-        logger.info(f"⚙️  Response Mode: {request.response_mode or 'async (默认)'}")
-        logger.info(f"⏱️  Timeout: {request.timeout or config.default_timeout} 秒")
+        _log_chat_request("/chat/async", "async", request)
 
         try:
             # Determine session_id for buffer key
@@ -338,7 +350,9 @@ def create_app(server_config: ServerConfig) -> FastAPI:
 
                 # Callback to create task when messages are flushed
                 async def process_combined_message(combined_message: str):
-                    task_id = task_manager.create_task(
+                    # The client already got "buffering", so wait for queue space
+                    # rather than dropping the combined message on QueueFull
+                    task_id = await task_manager.submit_task(
                         agent, combined_message, request.user_id, request.session_id
                     )
                     logger.info(
@@ -378,8 +392,11 @@ def create_app(server_config: ServerConfig) -> FastAPI:
                     message="Task submitted successfully",
                 )
 
+        except asyncio.QueueFull:
+            logger.warning(f"⚠️ 任务队列已满，拒绝请求: user_id={request.user_id}")
+            raise HTTPException(status_code=429, detail="Too many pending tasks")
         except Exception as e:
-            logger.error(f"❌ /chat/async 端点错误: {str(e)}", exc_info=True)
+            _log_endpoint_error("/chat/async", e)
             logger.error(f"   请求详情: user_id={request.user_id}, message={request.message[:100]}")
             raise HTTPException(status_code=500, detail=str(e))
 
@@ -390,7 +407,7 @@ def create_app(server_config: ServerConfig) -> FastAPI:
     )
     async def get_task_status(task_id: str):
         """Get status of an async task."""
-        status = await task_manager.get_task_status(task_id)
+        status = task_manager.get_task_status(task_id)
         if not status:
             raise HTTPException(status_code=404, detail="Task not found")
         return status
@@ -422,7 +439,7 @@ def create_app(server_config: ServerConfig) -> FastAPI:
                 total_messages=len(history),
             )
         except Exception as e:
-            logger.error(f"❌ /session/{session_id}/history 端点错误: {str(e)}", exc_info=True)
+            _log_endpoint_error(f"/session/{session_id}/history", e)
             raise HTTPException(status_code=404, detail=str(e))
 
     @app.delete(
@@ -436,7 +453,7 @@ def create_app(server_config: ServerConfig) -> FastAPI:
             agent.clear_session(user_id, session_id)
             return {"message": "Session cleared successfully"}
         except Exception as e:
-            logger.error(f"❌ DELETE /session/{session_id} 端点错误: {str(e)}", exc_info=True)
+            _log_endpoint_error(f"DELETE /session/{session_id}", e)
             raise HTTPException(status_code=404, detail=str(e))
 
     return app
@@ -3,22 +3,135 @@ Async task management for background processing.
 """
 
 import asyncio
-import uuid
-from datetime import datetime
-from typing import Dict, Optional
-from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import itertools
+import secrets
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Deque, Dict, Literal, Optional, Set, Tuple
 
 from .models import TaskStatus, ChatResponse
 from claude_code_server import ClaudeAgent
+from claude_code_server.logger import logger
+
+
+def _loop_time_to_datetime(loop_time: float, now: float) -> datetime:
+    """Convert an event loop timestamp into wall-clock time, given the loop's current time."""
+    return datetime.now() - timedelta(seconds=now - loop_time)
+
+
+@dataclass(slots=True)
+class _TaskResult:
+    """Fields of a finished chat kept in memory until the status is read."""
+
+    content: str
+    session_id: str
+    claude_session_id: Optional[str]
+    success: bool
+    metadata: dict
+
+    def to_response(self) -> ChatResponse:
+        return ChatResponse(
+            content=self.content,
+            session_id=self.session_id,
+            claude_session_id=self.claude_session_id,
+            success=self.success,
+            metadata=self.metadata,
+        )
+
+
+@dataclass(slots=True)
+class _TaskRecord:
+    """
+    In-memory task state; timestamps are event loop (monotonic) times.
+
+    Pydantic models are only built when a status is read by the API.
+    """
+
+    task_id: str
+    status: Literal["pending", "processing", "completed", "failed"]
+    created_at: float
+    completed_at: Optional[float] = None
+    result: Optional[_TaskResult] = None
+    error: Optional[str] = None
+    # Links in TaskManager's completion-ordered list of finished tasks
+    prev: Optional["_TaskRecord"] = field(default=None, repr=False, compare=False)
+    next: Optional["_TaskRecord"] = field(default=None, repr=False, compare=False)
+
+    def to_status(self, now: float) -> TaskStatus:
+        return TaskStatus(
+            task_id=self.task_id,
+            status=self.status,
+            result=self.result.to_response() if self.result else None,
+            error=self.error,
+            created_at=_loop_time_to_datetime(self.created_at, now),
+            completed_at=(
+                _loop_time_to_datetime(self.completed_at, now) if self.completed_at else None
+            ),
+        )
+
+
+def _format_message_parts(message: str) -> str:
+    """Render each line of a combined message as a numbered, truncated list."""
+    return "\n".join(
+        f"   {i}. {part[:100]}{'...' if len(part) > 100 else ''}"
+        for i, part in enumerate(message.split("\n"), 1)
+    )
 
 
 class TaskManager:
-    """Manages async tasks for chat processing."""
+    """
+    Manages async tasks for chat processing.
+
+    Submitted tasks go through a bounded queue drained by a fixed number of
+    worker coroutines, which await agent.achat() directly on the event loop.
+    When the queue is full, create_task raises asyncio.QueueFull.
+    """
 
-    def __init__(self, max_workers: int = 10):
-        self.executor = ThreadPoolExecutor(max_workers=max_workers)
-        self.tasks: Dict[str, TaskStatus] = {}
-        self._lock = asyncio.Lock()
+    def __init__(
+        self,
+        max_workers: int = 10,
+        max_queue_size: int = 100,
+        max_tasks: int = 10_000,
+        max_age_seconds: int = 3600,
+    ):
+        """
+        Initialize task manager.
+
+        Args:
+            max_workers: Number of tasks executed concurrently
+            max_queue_size: Maximum number of tasks waiting for a worker
+            max_tasks: Maximum number of tasks kept in memory; the oldest are evicted
+            max_age_seconds: How long finished tasks stay queryable
+        """
+        self.max_workers = max_workers
+        self.max_tasks = max_tasks
+        self.max_age_seconds = max_age_seconds
+        # Captured on the first create_task, which always runs on the loop
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # Task IDs are opaque handles: a random per-manager prefix plus a counter
+        # is unique within the process and much cheaper than uuid4().
+        self._id_prefix = secrets.token_hex(4)
+        self._id_counter = itertools.count()
+        # Each task only mutates its own entry and all access happens on the
+        # event loop thread, so no lock is needed around this dict.
+        self.tasks: "OrderedDict[str, _TaskRecord]" = OrderedDict()
+        # Finished tasks as a doubly-linked list in completion order, so cleanup
+        # stops at the first task that is still young and eviction can unlink
+        # a record in O(1)
+        self._completed_head: Optional[_TaskRecord] = None
+        self._completed_tail: Optional[_TaskRecord] = None
+        # Records of removed tasks, reused by create_task to cut allocations.
+        # Records are only ever looked up by task_id, so reuse is safe.
+        self._record_pool: Deque[_TaskRecord] = deque(maxlen=1024)
+        # In-flight requests keyed by (session, message digest); a duplicate
+        # submitted while the original runs shares its result instead of
+        # invoking Claude again
+        self._inflight: Dict[Tuple[str, bytes], asyncio.Future] = {}
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue_size)
+        # Strong references to the worker tasks; the loop only keeps weak ones
+        self._workers: Set[asyncio.Task] = set()
 
     def create_task(
         self, agent: ClaudeAgent, message: str, user_id: str, session_id: Optional[str]
@@ -28,39 +141,141 @@ class TaskManager:
 
         Returns:
             task_id: Unique task identifier
+
+        Raises:
+            asyncio.QueueFull: If too many tasks are already waiting
+        """
+        task_id, job = self._register_task(
+            agent, message, user_id, session_id, reject_if_full=True
+        )
+        if job is not None:
+            self._queue.put_nowait(job)
+        return task_id
+
+    async def submit_task(
+        self, agent: ClaudeAgent, message: str, user_id: str, session_id: Optional[str]
+    ) -> str:
         """
-        from claude_code_server.logger import logger
+        Create a new async task, waiting for queue space instead of raising QueueFull.
 
-        task_id = str(uuid.uuid4())
+        For callers that have already acknowledged the request and so cannot
+        answer 429, such as the debounce flush callback.
 
-        task_status = TaskStatus(
-            task_id=task_id,
-            status="pending",
-            created_at=datetime.now(),
+        Returns:
+            task_id: Unique task identifier
+        """
+        task_id, job = self._register_task(
+            agent, message, user_id, session_id, reject_if_full=False
         )
+        if job is not None:
+            try:
+                await self._queue.put(job)
+            except BaseException:
+                # Never queued: fail the task and release duplicates waiting on it
+                self._finish_task(task_id, None, "Task cancelled")
+                shared = self._inflight.pop(job[-1], None)
+                if shared is not None and not shared.done():
+                    shared.set_result((None, "Task cancelled"))
+                raise
+        return task_id
 
-        self.tasks[task_id] = task_status
+    def _register_task(
+        self,
+        agent: ClaudeAgent,
+        message: str,
+        user_id: str,
+        session_id: Optional[str],
+        reject_if_full: bool,
+    ) -> Tuple[str, Optional[tuple]]:
+        """Record a new task and return it with the job to queue (None if deduplicated)."""
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+            for _ in range(self.max_workers):
+                self._workers.add(self._loop.create_task(self._worker()))
+        loop = self._loop
 
-        logger.info("=" * 80)
-        logger.info("🎯 创建异步任务")
-        logger.info("=" * 80)
-        logger.info(f"📋 Task ID: {task_id}")
-        logger.info(f"👤 User ID: {user_id}")
-        logger.info(f"🔑 Session ID: {session_id or f'user_{user_id}'}")
-        logger.info(f"📝 消息内容: {message}")
-        logger.info(f"📏 消息长度: {len(message)} 字符")
-        # 检测是否为合并消息（包含换行符）
-        if '\n' in message:
-            parts = message.split('\n')
-            logger.info(f"🔄 检测到合并消息，包含 {len(parts)} 部分:")
-            for i, part in enumerate(parts, 1):
-                logger.info(f"   {i}. {part[:100]}{'...' if len(part) > 100 else ''}")
-        logger.info("=" * 80)
+        effective_session_id = session_id or f"user_{user_id}"
+        inflight_key = (
+            effective_session_id,
+            hashlib.blake2b(message.encode(), digest_size=16).digest(),
+        )
+        shared = self._inflight.get(inflight_key)
+        if shared is None and reject_if_full and self._queue.full():
+            raise asyncio.QueueFull()
 
-        # Submit to executor
-        asyncio.create_task(self._execute_task(task_id, agent, message, user_id, session_id))
+        task_id = f"{self._id_prefix}{next(self._id_counter):08x}"
 
-        return task_id
+        self.tasks[task_id] = self._new_record(task_id, loop.time())
+        if len(self.tasks) > self.max_tasks:
+            _, evicted = self.tasks.popitem(last=False)
+            self._unlink_completed(evicted)
+            self._recycle_record(evicted)
+
+        if shared is not None:
+            logger.info(f"🔗 任务 {task_id} 与进行中的相同请求合并")
+            self.tasks[task_id].status = "processing"
+            shared.add_done_callback(
+                lambda future: self._finish_task(task_id, *future.result())
+            )
+            return task_id, None
+
+        self._inflight[inflight_key] = loop.create_future()
+
+        # Task logging happens in _execute_task, off the request path
+        job = (task_id, agent, message, user_id, session_id, effective_session_id, inflight_key)
+        return task_id, job
+
+    async def _worker(self):
+        """Execute queued tasks one at a time."""
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._execute_task(*job)
+            finally:
+                self._queue.task_done()
+
+    def _new_record(self, task_id: str, created_at: float) -> _TaskRecord:
+        """Take a record from the pool (or allocate one) and reset it."""
+        if not self._record_pool:
+            return _TaskRecord(task_id=task_id, status="pending", created_at=created_at)
+
+        record = self._record_pool.pop()
+        record.task_id = task_id
+        record.status = "pending"
+        record.created_at = created_at
+        return record
+
+    def _link_completed(self, record: _TaskRecord) -> None:
+        """Append a finished task to the tail of the completion list."""
+        record.prev = self._completed_tail
+        record.next = None
+        if self._completed_tail:
+            self._completed_tail.next = record
+        else:
+            self._completed_head = record
+        self._completed_tail = record
+
+    def _unlink_completed(self, record: _TaskRecord) -> None:
+        """Remove a task from the completion list (no-op if not linked)."""
+        if record.prev:
+            record.prev.next = record.next
+        elif self._completed_head is record:
+            self._completed_head = record.next
+        else:
+            return
+
+        if record.next:
+            record.next.prev = record.prev
+        else:
+            self._completed_tail = record.prev
+        record.prev = record.next = None
+
+    def _recycle_record(self, record: _TaskRecord) -> None:
+        """Drop references held by a removed record and return it to the pool."""
+        record.completed_at = None
+        record.result = None
+        record.error = None
+        self._record_pool.append(record)
 
     async def _execute_task(
         self,
@@ -69,64 +284,138 @@ class TaskManager:
         message: str,
         user_id: str,
         session_id: Optional[str],
+        effective_session_id: str,
+        inflight_key: Tuple[str, bytes],
     ):
         """Execute chat task in background."""
-        from claude_code_server.logger import logger
-
-        async with self._lock:
-            if task_id in self.tasks:
-                self.tasks[task_id].status = "processing"
+        task = self.tasks.get(task_id)
+        if task:
+            task.status = "processing"
 
+        logger.info("=" * 80)
         logger.info(f"▶️  开始执行任务 {task_id}")
+        logger.info("=" * 80)
+        logger.info(f"👤 User ID: {user_id}")
+        logger.info(f"🔑 Session ID: {effective_session_id}")
+        logger.info(f"📝 消息内容: {message}")
+        logger.info(f"📏 消息长度: {len(message)} 字符")
+        # 检测是否为合并消息（包含换行符）；各部分明细只在日志级别启用时才格式化
+        if "\n" in message:
+            part_count = message.count("\n") + 1
+            logger.info(f"🔄 检测到合并消息，包含 {part_count} 部分:")
+            logger.opt(lazy=True).info("{}", lambda: _format_message_parts(message))
+        logger.info("=" * 80)
 
+        loop = self._loop
+        result: Optional[_TaskResult] = None
+        error: Optional[str] = None
         try:
-            # Run in thread pool (since agent.chat is sync)
-            loop = asyncio.get_event_loop()
-            start_time = datetime.now()
+            start_time = loop.time()
 
-            response = await loop.run_in_executor(
-                self.executor, lambda: agent.chat(message, user_id, session_id)
-            )
+            response = await agent.achat(message, user_id, session_id)
 
-            duration = (datetime.now() - start_time).total_seconds()
+            duration = loop.time() - start_time
             logger.info(f"✅ 任务 {task_id} 执行成功，耗时: {duration:.2f}s")
 
-            # Update task with result
-            async with self._lock:
-                if task_id in self.tasks:
-                    self.tasks[task_id].status = "completed"
-                    self.tasks[task_id].completed_at = datetime.now()
-                    self.tasks[task_id].result = ChatResponse(
-                        content=response.content,
-                        session_id=session_id or f"user_{user_id}",
-                        claude_session_id=response.metadata.get("claude_session_id"),
-                        success=response.success,
-                        metadata=response.metadata,
-                    )
+            result = _TaskResult(
+                content=response.content,
+                session_id=effective_session_id,
+                claude_session_id=response.metadata.get("claude_session_id"),
+                success=response.success,
+                metadata=response.metadata,
+            )
 
         except Exception as e:
             logger.error(f"❌ 任务 {task_id} 执行失败: {str(e)}")
-            async with self._lock:
-                if task_id in self.tasks:
-                    self.tasks[task_id].status = "failed"
-                    self.tasks[task_id].completed_at = datetime.now()
-                    self.tasks[task_id].error = str(e)
+            error = str(e)
+
+        finally:
+            if result is None and error is None:
+                error = "Task cancelled"
+            self._finish_task(task_id, result, error)
+            # Hand the outcome to duplicate requests that attached meanwhile
+            shared = self._inflight.pop(inflight_key, None)
+            if shared is not None:
+                shared.set_result((result, error))
 
-    async def get_task_status(self, task_id: str) -> Optional[TaskStatus]:
+    def _finish_task(
+        self, task_id: str, result: Optional[_TaskResult], error: Optional[str]
+    ) -> None:
+        """Record the outcome of a task (no-op if it was evicted meanwhile)."""
+        task = self.tasks.get(task_id)
+        if not task:
+            return
+
+        task.status = "failed" if error is not None else "completed"
+        task.completed_at = self._loop.time()
+        task.result = result
+        task.error = error
+        self._link_completed(task)
+
+    def get_task_status(self, task_id: str) -> Optional[TaskStatus]:
         """Get task status by ID."""
-        async with self._lock:
-            return self.tasks.get(task_id)
+        task = self.tasks.get(task_id)
+        # The manager's own loop clock works from any thread, not only inside the loop
+        return task.to_status(self._loop.time()) if task else None
 
-    async def cleanup_old_tasks(self, max_age_seconds: int = 3600):
+    async def cleanup_old_tasks(self, max_age_seconds: Optional[int] = None):
         """Clean up old completed tasks."""
-        now = datetime.now()
-        async with self._lock:
-            to_remove = []
-            for task_id, task in self.tasks.items():
-                if task.completed_at:
-                    age = (now - task.completed_at).total_seconds()
-                    if age > max_age_seconds:
-                        to_remove.append(task_id)
-
-            for task_id in to_remove:
-                del self.tasks[task_id]
+        if max_age_seconds is None:
+            max_age_seconds = self.max_age_seconds
+
+        now = asyncio.get_running_loop().time()
+        expired = []
+        task = self._completed_head
+        while task and now - task.completed_at > max_age_seconds:
+            expired.append(task)
+            task = task.next
+        if not expired:
+            return
+
+        # Expired tasks are a prefix of the completion list: detach it at once
+        self._completed_head = task
+        if task:
+            task.prev = None
+        else:
+            self._completed_tail = None
+
+        if len(expired) > len(self.tasks) // 2:
+            # Rebuilding in one pass is cheaper than many individual deletes
+            expired_ids = {task.task_id for task in expired}
+            self.tasks = OrderedDict(
+                (task_id, task) for task_id, task in self.tasks.items()
+                if task_id not in expired_ids
+            )
+        else:
+            for task in expired:
+                del self.tasks[task.task_id]
+
+        for task in expired:
+            task.prev = task.next = None
+            self._recycle_record(task)
+
+        logger.info(f"🧹 已清理 {len(expired)} 个过期任务")
+
+    async def shutdown(self, timeout: Optional[float] = None):
+        """
+        Wait for queued and running tasks to finish, then stop the workers.
+
+        Args:
+            timeout: Seconds to wait before cancelling the remaining tasks
+        """
+        logger.info(f"⏳ 等待任务完成（排队中: {self._queue.qsize()}）...")
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("⚠️ 等待任务超时，取消剩余任务")
+
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers.clear()
+
+    async def cleanup_loop(self):
+        """Periodically clean up finished tasks (run as a background task)."""
+        while True:
+            await asyncio.sleep(self.max_age_seconds / 10)
+            await self.cleanup_old_tasks()
@@ -0,0 +1,175 @@
+"""
+Shared pytest fixtures.
+
+Living at the repo root puts the project on sys.path for every test module,
+so individual tests don't need their own path setup.
+"""
+
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+from claude_code_server import (
+    ClaudeClient,
+    ClaudeConfig,
+    OutputFormat,
+    PermissionMode,
+    RedisSessionStore,
+)
+from tests._stores import CountingStore
+
+
+CLAUDE_PROBE_CACHE_KEY = "claude/available"
+CLAUDE_PROBE_MAX_AGE = 600  # seconds a cached probe result stays valid across runs
+
+TEST_REDIS_DB = int(os.environ.get("TEST_REDIS_DB", "15"))  # flushed by the Redis fixtures
+
+SERVER_CONFIG_PATH = Path(__file__).parent / "config.yaml"
+_server_config_key = pytest.StashKey()
+
+
+def pytest_sessionstart(session):
+    """Load the API server config once, stopping the run if it is broken."""
+    try:
+        from claude_code_server_api import load_config
+    except ImportError:
+        return  # server extra not installed; the API fixtures skip
+
+    try:
+        session.config.stash[_server_config_key] = load_config(str(SERVER_CONFIG_PATH))
+    except Exception as e:
+        pytest.exit(f"Cannot load {SERVER_CONFIG_PATH.name}: {e}", returncode=1)
+
+
+@pytest.fixture(scope="session")
+def claude_available(request) -> bool:
+    """Probe the Claude CLI once per session (and reuse recent results across runs)."""
+    cache = getattr(request.config, "cache", None)
+    if cache is not None:
+        cached = cache.get(CLAUDE_PROBE_CACHE_KEY, None)
+        if cached and time.time() - cached["checked_at"] < CLAUDE_PROBE_MAX_AGE:
+            return cached["available"]
+
+    try:
+        ClaudeClient().get_version()
+        available = True
+    except Exception:
+        available = False
+
+    if cache is not None:
+        cache.set(CLAUDE_PROBE_CACHE_KEY, {"available": available, "checked_at": time.time()})
+    return available
+
+
+@pytest.fixture(scope="session")
+def require_claude(claude_available) -> None:
+    """Skip tests that talk to Claude when the CLI is unreachable."""
+    if not claude_available:
+        pytest.skip("claude CLI unreachable")
+
+
+@pytest.fixture(scope="session")
+def default_config(require_claude) -> ClaudeConfig:
+    """Config used by the live Claude tests."""
+    return ClaudeConfig(output_format=OutputFormat.JSON, timeout=30)
+
+
+@pytest.fixture(scope="session")
+def client_factory(require_claude):
+    """Build ClaudeClients, reusing one per distinct config for the whole session."""
+    clients: dict[str, ClaudeClient] = {}
+
+    def factory(config: ClaudeConfig) -> ClaudeClient:
+        key = config.model_dump_json()
+        if key not in clients:
+            clients[key] = ClaudeClient(config=config)
+        return clients[key]
+
+    return factory
+
+
+@pytest.fixture(scope="session")
+def client(client_factory, default_config) -> ClaudeClient:
+    """One ClaudeClient shared by the whole test session."""
+    return client_factory(default_config)
+
+
+@pytest.fixture(scope="session")
+def deny_all_client(client_factory) -> ClaudeClient:
+    """Client that grants no tool permissions (headless DEFAULT mode denies them)."""
+    return client_factory(
+        ClaudeConfig(
+            output_format=OutputFormat.JSON,
+            permission_mode=PermissionMode.DEFAULT,
+            timeout=30,
+        )
+    )
+
+
+@pytest.fixture(scope="session")
+def pooled_client(default_config):
+    """Client backed by one warm CLI process, so consecutive turns skip the cold start."""
+    client = ClaudeClient(config=default_config)
+    client.start_process_pool(1)
+    yield client
+    client.close_process_pool()
+
+
+@pytest.fixture
+def counting_store() -> CountingStore:
+    """A fresh in-memory store that counts its calls."""
+    return CountingStore()
+
+
+@pytest.fixture(scope="session")
+def redis_client():
+    """One Redis connection pool on the test db, flushed before and after the session."""
+    redis = pytest.importorskip("redis")
+
+    # No connection retries: a missing server should skip at once, not after backoff
+    client = redis.Redis(
+        host="localhost", port=6379, db=TEST_REDIS_DB, decode_responses=False, retry=None
+    )
+    try:
+        client.ping()
+    except redis.ConnectionError:
+        client.close()
+        pytest.skip("Redis not running")
+
+    # Keys leaked by an interrupted run are cleared here rather than after every test
+    client.flushdb()
+    yield client
+    client.flushdb()
+    client.close()
+
+
+@pytest.fixture
+def redis_store_factory(redis_client):
+    """Build RedisSessionStores on the shared client."""
+
+    def factory(prefix: str, ttl=None, serializer: str = "json") -> RedisSessionStore:
+        return RedisSessionStore(redis_client, prefix=prefix, ttl=ttl, serializer=serializer)
+
+    return factory
+
+
+@pytest.fixture(scope="session")
+def app(request):
+    """The FastAPI app, wired once for the whole session."""
+    server = pytest.importorskip("claude_code_server_api")
+    # Keep test sessions in memory rather than writing them under the repo
+    config = request.config.stash[_server_config_key].model_copy(
+        update={"session_store_type": "memory"}
+    )
+    return server.create_app(config)
+
+
+@pytest.fixture(scope="session")
+def api_client(app):
+    """TestClient for the app; startup and shutdown run once for the whole session."""
+    from fastapi.testclient import TestClient
+
+    with TestClient(app) as client:
+        yield client
@@ -51,8 +51,9 @@ def main():
         print(f"← Claude: {response.content[:200]}...")
 
         # Save to session history
-        session_manager.add_message(session_id, "user", message)
-        session_manager.add_message(session_id, "assistant", response.content)
+        session_manager.add_messages(
+            session_id, [("user", message), ("assistant", response.content)]
+        )
 
     # Show conversation history
     print("\n" + "=" * 60)
@@ -53,8 +53,9 @@ class ChatBot:
         response = self.client.chat(message, session_id=session_id)
 
         # Save to history
-        self.session_manager.add_message(session_id, "user", message)
-        self.session_manager.add_message(session_id, "assistant", response.content)
+        self.session_manager.add_messages(
+            session_id, [("user", message), ("assistant", response.content)]
+        )
 
         return response.content
 
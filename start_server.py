@@ -9,6 +9,7 @@ Usage:
 """
 
 import argparse
+import importlib.util
 import uvicorn
 import sys
 from pathlib import Path
@@ -20,6 +21,19 @@ from claude_code_server_api import create_app, load_config
 from claude_code_server.logger import setup_logging
 
 
+def select_loop_and_http() -> tuple[str, str]:
+    """
+    Prefer uvloop and httptools (installed with uvicorn[standard]).
+
+    uvloop is not available on Windows; fall back to uvicorn's defaults.
+    """
+    if sys.platform == "win32":
+        return "auto", "auto"
+    loop = "uvloop" if importlib.util.find_spec("uvloop") else "auto"
+    http = "httptools" if importlib.util.find_spec("httptools") else "auto"
+    return loop, http
+
+
 def main():
     parser = argparse.ArgumentParser(description="Start Claude Code Server API")
     parser.add_argument(
@@ -75,6 +89,7 @@ def main():
 
     # Create app
     app = create_app(config)
+    loop, http = select_loop_and_http()
 
     # Print startup info
     print("=" * 60)
@@ -86,6 +101,7 @@ def main():
     print(f"   Working Dir: {config.working_directory}")
     print(f"   Claude Binary: {config.claude_bin}")
     print(f"   Session Store: {config.session_store_type}")
+    print(f"   Event Loop: {loop}")
     if config.api_key:
         print(f"   API Key: {'*' * 8} (enabled)")
     print("=" * 60)
@@ -101,6 +117,8 @@ def main():
         port=config.port,
         reload=config.reload,
         workers=config.workers if not config.reload else 1,
+        loop=loop,
+        http=http,
     )
 
 
@@ -7,21 +7,67 @@ to verify that they are properly combined by the debouncing mechanism.
 """
 
 import asyncio
+import contextvars
+import io
+import sys
 import time
-from datetime import datetime
 import httpx
+import orjson
+
+try:
+    import h2  # noqa: F401  (enables httpx's HTTP/2 support)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
 
 
 BASE_URL = "http://localhost:8000"
 API_KEY = None  # Set if your server requires API key
 
+# Scenarios run concurrently; each one writes to its own buffer so the
+# output of different scenarios doesn't interleave
+_output: contextvars.ContextVar[io.StringIO] = contextvars.ContextVar("output")
+
+
+# (whole second, "HH:MM:SS") of the last timestamp, rebuilt once per second
+_last_second = (-1, "")
+
+
+def _ts() -> str:
+    """Current local time as HH:MM:SS.mmm."""
+    global _last_second
+    now = time.time()
+    second = int(now)
+    if second != _last_second[0]:
+        _last_second = (second, time.strftime("%H:%M:%S", time.localtime(second)))
+    return f"{_last_second[1]}.{int((now - second) * 1000):03d}"
+
+
+async def post_json(client: httpx.AsyncClient, path: str, payload: dict) -> httpx.Response:
+    """POST a JSON body serialized with orjson."""
+    return await client.post(
+        path, content=orjson.dumps(payload), headers={"Content-Type": "application/json"}
+    )
+
+
+def log(*args, **kwargs):
+    """Print into the current scenario's buffer."""
+    print(*args, file=_output.get(), **kwargs)
+
+
+async def run_buffered(scenario, client: httpx.AsyncClient):
+    """Run one scenario and print its buffered output when it finishes."""
+    buffer = io.StringIO()
+    _output.set(buffer)
+    try:
+        await scenario(client)
+    finally:
+        sys.stdout.write(buffer.getvalue())
+        sys.stdout.flush()
+
 
 async def send_message(client: httpx.AsyncClient, message: str, user_id: str):
     """Send a single message to the async endpoint."""
-    headers = {}
-    if API_KEY:
-        headers["X-API-Key"] = API_KEY
-
     payload = {
         "message": message,
         "user_id": user_id,
@@ -29,185 +75,197 @@ async def send_message(client: httpx.AsyncClient, message: str, user_id: str):
         "debounce_window": 3.0,  # 3 second window
     }
 
-    timestamp = datetime.now().strftime("%H:%M:%S.%f")[:-3]
-    print(f"[{timestamp}] 📤 Sending: '{message}'")
+    timestamp = _ts()
+    log(f"[{timestamp}] 📤 Sending: '{message}'")
 
-    response = await client.post(f"{BASE_URL}/chat/async", json=payload, headers=headers)
+    response = await post_json(client, "/chat/async", payload)
     result = response.json()
 
-    print(f"[{timestamp}] ✅ Response: {result}")
+    log(f"[{timestamp}] ✅ Response: {result}")
     return result
 
 
-async def test_rapid_messages():
+async def test_rapid_messages(client: httpx.AsyncClient):
     """Test Case 1: Rapid successive messages (should be combined)."""
-    print("\n" + "=" * 60)
-    print("TEST 1: Rapid Successive Messages")
-    print("=" * 60)
-    print("Scenario: User sends 'Hello', 'How', 'are', 'you?' in quick succession")
-    print("Expected: All 4 messages combined into one task\n")
+    log("\n" + "=" * 60)
+    log("TEST 1: Rapid Successive Messages")
+    log("=" * 60)
+    log("Scenario: User sends 'Hello', 'How', 'are', 'you?' in quick succession")
+    log("Expected: All 4 messages combined into one task\n")
 
     user_id = "test_user_1"
 
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        # Send messages rapidly
-        await send_message(client, "Hello", user_id)
+    # Dispatch messages rapidly without waiting for each response
+    async with asyncio.TaskGroup() as tg:
+        tg.create_task(send_message(client, "Hello", user_id))
         await asyncio.sleep(0.3)  # 300ms delay
 
-        await send_message(client, "How", user_id)
+        tg.create_task(send_message(client, "How", user_id))
         await asyncio.sleep(0.3)
 
-        await send_message(client, "are", user_id)
+        tg.create_task(send_message(client, "are", user_id))
         await asyncio.sleep(0.3)
 
-        await send_message(client, "you?", user_id)
+        tg.create_task(send_message(client, "you?", user_id))
 
-        print(
-            "\n⏳ Waiting 4 seconds for debounce timer to expire and task to be created..."
-        )
-        await asyncio.sleep(4)
+    log(
+        "\n⏳ Waiting 4 seconds for debounce timer to expire and task to be created..."
+    )
+    await asyncio.sleep(4)
 
-        print("\n✅ Test 1 Complete!")
-        print("Check server logs to verify messages were combined\n")
+    log("\n✅ Test 1 Complete!")
+    log("Check server logs to verify messages were combined\n")
 
 
-async def test_delayed_messages():
+async def test_delayed_messages(client: httpx.AsyncClient):
     """Test Case 2: Messages with long delay (should NOT be combined)."""
-    print("\n" + "=" * 60)
-    print("TEST 2: Delayed Messages")
-    print("=" * 60)
-    print(
+    log("\n" + "=" * 60)
+    log("TEST 2: Delayed Messages")
+    log("=" * 60)
+    log(
         "Scenario: User sends 'First message', waits 4s, then sends 'Second message'"
     )
-    print("Expected: Two separate tasks created\n")
+    log("Expected: Two separate tasks created\n")
 
     user_id = "test_user_2"
 
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        await send_message(client, "First message", user_id)
+    await send_message(client, "First message", user_id)
 
-        print("\n⏳ Waiting 4 seconds (longer than debounce window)...")
-        await asyncio.sleep(4)
+    log("\n⏳ Waiting 4 seconds (longer than debounce window)...")
+    await asyncio.sleep(4)
 
-        await send_message(client, "Second message", user_id)
+    await send_message(client, "Second message", user_id)
 
-        print("\n⏳ Waiting 4 seconds for second message to process...")
-        await asyncio.sleep(4)
+    log("\n⏳ Waiting 4 seconds for second message to process...")
+    await asyncio.sleep(4)
 
-        print("\n✅ Test 2 Complete!")
-        print("Check server logs to verify two separate tasks were created\n")
+    log("\n✅ Test 2 Complete!")
+    log("Check server logs to verify two separate tasks were created\n")
 
 
-async def test_debounce_disabled():
+async def test_debounce_disabled(client: httpx.AsyncClient):
     """Test Case 3: Debouncing disabled (immediate processing)."""
-    print("\n" + "=" * 60)
-    print("TEST 3: Debouncing Disabled")
-    print("=" * 60)
-    print("Scenario: User sends messages with debouncing explicitly disabled")
-    print("Expected: Each message creates a task immediately\n")
+    log("\n" + "=" * 60)
+    log("TEST 3: Debouncing Disabled")
+    log("=" * 60)
+    log("Scenario: User sends messages with debouncing explicitly disabled")
+    log("Expected: Each message creates a task immediately\n")
 
     user_id = "test_user_3"
 
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        headers = {}
-        if API_KEY:
-            headers["X-API-Key"] = API_KEY
-
-        # Send with debouncing disabled
-        payload1 = {
-            "message": "Message 1",
+    async def send_undebounced(message: str):
+        payload = {
+            "message": message,
             "user_id": user_id,
             "enable_debounce": False,  # Disable debouncing
         }
 
-        timestamp = datetime.now().strftime("%H:%M:%S.%f")[:-3]
-        print(f"[{timestamp}] 📤 Sending: 'Message 1' (debounce=False)")
-        response = await client.post(
-            f"{BASE_URL}/chat/async", json=payload1, headers=headers
-        )
+        timestamp = _ts()
+        log(f"[{timestamp}] 📤 Sending: '{message}' (debounce=False)")
+        response = await post_json(client, "/chat/async", payload)
         result = response.json()
-        print(f"[{timestamp}] ✅ Response: {result}")
+        log(f"[{timestamp}] ✅ Response: {result}")
+        return result
 
+    # Send with debouncing disabled
+    async with asyncio.TaskGroup() as tg:
+        tg.create_task(send_undebounced("Message 1"))
         await asyncio.sleep(0.5)
 
-        payload2 = {
-            "message": "Message 2",
-            "user_id": user_id,
-            "enable_debounce": False,
-        }
+        tg.create_task(send_undebounced("Message 2"))
 
-        timestamp = datetime.now().strftime("%H:%M:%S.%f")[:-3]
-        print(f"[{timestamp}] 📤 Sending: 'Message 2' (debounce=False)")
-        response = await client.post(
-            f"{BASE_URL}/chat/async", json=payload2, headers=headers
-        )
-        result = response.json()
-        print(f"[{timestamp}] ✅ Response: {result}")
-
-        print("\n✅ Test 3 Complete!")
-        print("Both messages should have created tasks immediately\n")
+    log("\n✅ Test 3 Complete!")
+    log("Both messages should have created tasks immediately\n")
 
 
-async def test_timer_reset():
+async def test_timer_reset(client: httpx.AsyncClient):
     """Test Case 4: Timer reset on new message (debounce window extends)."""
-    print("\n" + "=" * 60)
-    print("TEST 4: Timer Reset")
-    print("=" * 60)
-    print("Scenario: User sends message every 2s (debounce window is 3s)")
-    print("Expected: Timer keeps resetting, all messages combined when user stops\n")
+    log("\n" + "=" * 60)
+    log("TEST 4: Timer Reset")
+    log("=" * 60)
+    log("Scenario: User sends message every 2s (debounce window is 3s)")
+    log("Expected: Timer keeps resetting, all messages combined when user stops\n")
 
     user_id = "test_user_4"
 
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        # Send 3 messages, 2 seconds apart
-        await send_message(client, "Part 1", user_id)
+    # Send 3 messages, 2 seconds apart
+    async with asyncio.TaskGroup() as tg:
+        tg.create_task(send_message(client, "Part 1", user_id))
         await asyncio.sleep(2)
 
-        await send_message(client, "Part 2", user_id)
+        tg.create_task(send_message(client, "Part 2", user_id))
         await asyncio.sleep(2)
 
-        await send_message(client, "Part 3", user_id)
+        tg.create_task(send_message(client, "Part 3", user_id))
 
-        print("\n⏳ Waiting 4 seconds for debounce timer to expire...")
-        await asyncio.sleep(4)
+    log("\n⏳ Waiting 4 seconds for debounce timer to expire...")
+    await asyncio.sleep(4)
 
-        print("\n✅ Test 4 Complete!")
-        print("All 3 messages should have been combined into one task\n")
+    log("\n✅ Test 4 Complete!")
+    log("All 3 messages should have been combined into one task\n")
 
 
 async def main():
     """Run all tests."""
-    print("=" * 60)
-    print("Message Debouncing Test Suite")
-    print("=" * 60)
-    print(f"Server: {BASE_URL}")
-    print("Make sure the server is running with debouncing enabled!\n")
+    print(
+        "=" * 60,
+        "Message Debouncing Test Suite",
+        "=" * 60,
+        f"Server: {BASE_URL}",
+        "Make sure the server is running with debouncing enabled!\n",
+        sep="\n",
+    )
 
-    try:
-        # Check server health
-        async with httpx.AsyncClient() as client:
-            response = await client.get(f"{BASE_URL}/health")
+    # One keep-alive pool shared by every request in the suite
+    async with httpx.AsyncClient(
+        base_url=BASE_URL,
+        # Concurrent requests share one connection over HTTP/2 when the server
+        # negotiates it (TLS + ALPN); plain http:// stays on HTTP/1.1 keep-alive
+        http2=HTTP2_AVAILABLE,
+        # Smoke tests: fail fast instead of waiting out a stalled server
+        timeout=httpx.Timeout(connect=1.0, read=5.0, write=5.0, pool=1.0),
+        limits=httpx.Limits(
+            max_keepalive_connections=20, max_connections=20, keepalive_expiry=30.0
+        ),
+        headers={"X-API-Key": API_KEY} if API_KEY else None,
+    ) as client:
+        try:
+            # Check server health
+            response = await client.get("/health")
             if response.status_code == 200:
                 print("✅ Server is healthy\n")
             else:
                 print("❌ Server health check failed")
                 return
-    except Exception as e:
-        print(f"❌ Cannot connect to server: {e}")
-        print("Please start the server first: claude-code-server --config config.yaml")
-        return
-
-    # Run tests
-    await test_rapid_messages()
-    await test_delayed_messages()
-    await test_debounce_disabled()
-    await test_timer_reset()
-
-    print("=" * 60)
-    print("All Tests Complete!")
-    print("=" * 60)
+        except Exception as e:
+            print(f"❌ Cannot connect to server: {e}")
+            print("Please start the server first: claude-code-server --config config.yaml")
+            return
+
+        # Each scenario uses its own user_id, so their debounce buffers are
+        # independent and the waits can overlap
+        # A failed request cancels every other scenario still running
+        connection_errors = []
+        try:
+            async with asyncio.TaskGroup() as tg:
+                tg.create_task(run_buffered(test_rapid_messages, client))
+                tg.create_task(run_buffered(test_delayed_messages, client))
+                tg.create_task(run_buffered(test_debounce_disabled, client))
+                tg.create_task(run_buffered(test_timer_reset, client))
+        except* (httpx.ConnectError, httpx.TimeoutException) as eg:
+            connection_errors.extend(eg.exceptions)
+
+        if connection_errors:
+            e = connection_errors[0]
+            print(f"❌ Lost connection to server, aborting: {type(e).__name__}: {e}")
+            return
+
     print(
-        "\n💡 Review the server logs to verify message combining behavior"
+        "=" * 60,
+        "All Tests Complete!",
+        "=" * 60,
+        "\n💡 Review the server logs to verify message combining behavior",
+        sep="\n",
     )
 
 
@@ -4,63 +4,76 @@
 """
 
 import httpx
+import orjson
 import time
 
 BASE_URL = "http://localhost:8000"
+JSON_HEADERS = {"Content-Type": "application/json"}
 
-def test_chat_endpoint():
+def test_chat_endpoint(client: httpx.Client):
     """测试 /chat 端点"""
     print("=" * 60)
     print("测试 /chat 端点...")
     print("=" * 60)
 
     try:
-        response = httpx.post(
-            f"{BASE_URL}/chat",
-            json={
-                "message": "你好",
-                "user_id": "test_user"
-            },
-            timeout=30.0
+        # /chat 同步等待 Claude 回复，读取超时需要更长
+        response = client.post(
+            "/chat",
+            content=orjson.dumps({"message": "你好", "user_id": "test_user"}),
+            headers=JSON_HEADERS,
+            timeout=httpx.Timeout(30.0, connect=1.0, pool=1.0)
         )
 
         print(f"状态码: {response.status_code}")
         print(f"响应: {response.text}")
 
+    except httpx.ConnectError:
+        raise
     except Exception as e:
         print(f"错误: {e}")
 
-def test_chat_async_endpoint():
+def test_chat_async_endpoint(client: httpx.Client):
     """测试 /chat/async 端点"""
     print("\n" + "=" * 60)
     print("测试 /chat/async 端点...")
     print("=" * 60)
 
     try:
-        response = httpx.post(
-            f"{BASE_URL}/chat/async",
-            json={
-                "message": "你好",
-                "user_id": "test_user"
-            },
-            timeout=30.0
+        response = client.post(
+            "/chat/async",
+            content=orjson.dumps({"message": "你好", "user_id": "test_user"}),
+            headers=JSON_HEADERS
         )
 
         print(f"状态码: {response.status_code}")
         print(f"响应: {response.text}")
 
+    except httpx.ConnectError:
+        raise
     except Exception as e:
         print(f"错误: {e}")
 
 if __name__ == "__main__":
-    # 先检查服务器是否运行
-    try:
-        response = httpx.get(f"{BASE_URL}/health", timeout=5.0)
-        print(f"✅ 服务器正在运行: {response.json()}\n")
-    except Exception as e:
-        print(f"❌ 无法连接到服务器: {e}")
-        print("请先启动服务器: claude-code-server --config config.yaml")
-        exit(1)
+    # 所有请求复用同一个 keep-alive 连接
+    with httpx.Client(
+        base_url=BASE_URL,
+        # 冒烟测试：服务器无响应时尽快失败
+        timeout=httpx.Timeout(connect=1.0, read=5.0, write=5.0, pool=1.0),
+        limits=httpx.Limits(max_keepalive_connections=5, keepalive_expiry=30.0)
+    ) as client:
+        # 先检查服务器是否运行
+        try:
+            response = client.get("/health", timeout=5.0)
+            print(f"✅ 服务器正在运行: {response.json()}\n")
+        except Exception as e:
+            print(f"❌ 无法连接到服务器: {e}")
+            print("请先启动服务器: claude-code-server --config config.yaml")
+            exit(1)
 
-    test_chat_endpoint()
-    test_chat_async_endpoint()
+        try:
+            test_chat_endpoint(client)
+            test_chat_async_endpoint(client)
+        except httpx.ConnectError as e:
+            print(f"❌ 与服务器的连接中断，停止测试: {e}")
+            exit(1)
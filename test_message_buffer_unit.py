@@ -5,16 +5,24 @@ Unit tests for MessageBuffer class.
 
 import asyncio
 import pytest
+import pytest_asyncio
 from claude_code_server_api.message_buffer import MessageBuffer
 
 
+@pytest_asyncio.fixture
+async def buffer():
+    """Shared buffer for tests that each use their own session IDs."""
+    buffer = MessageBuffer(default_window=0.01)  # 10ms for fast testing
+    yield buffer
+    await buffer.close()
+
+
 class TestMessageBuffer:
     """Test cases for MessageBuffer."""
 
     @pytest.mark.asyncio
-    async def test_single_message_immediate_flush(self):
+    async def test_single_message_immediate_flush(self, buffer):
         """Test that a single message is flushed after debounce window."""
-        buffer = MessageBuffer(default_window=0.1)  # 100ms for fast testing
         received_messages = []
 
         async def callback(combined_message: str):
@@ -25,11 +33,11 @@ class TestMessageBuffer:
             session_id="test_session_1",
             message="Hello",
             callback=callback,
-            debounce_window=0.1,
+            debounce_window=0.01,
         )
 
         # Wait for timer
-        await asyncio.sleep(0.15)
+        await asyncio.sleep(0.04)
 
         # Check callback was called
         assert len(received_messages) == 1
@@ -38,7 +46,7 @@ class TestMessageBuffer:
     @pytest.mark.asyncio
     async def test_multiple_messages_combined(self):
         """Test that multiple rapid messages are combined."""
-        buffer = MessageBuffer(default_window=0.2)
+        buffer = MessageBuffer(default_window=0.02)
         received_messages = []
 
         async def callback(combined_message: str):
@@ -48,19 +56,19 @@ class TestMessageBuffer:
         await buffer.add_message(
             session_id="test_session_2", message="Hello", callback=callback
         )
-        await asyncio.sleep(0.05)  # 50ms delay
+        await asyncio.sleep(0.005)  # 5ms delay
 
         await buffer.add_message(
             session_id="test_session_2", message="How", callback=callback
         )
-        await asyncio.sleep(0.05)
+        await asyncio.sleep(0.005)
 
         await buffer.add_message(
             session_id="test_session_2", message="are you?", callback=callback
         )
 
         # Wait for timer
-        await asyncio.sleep(0.3)
+        await asyncio.sleep(0.05)
 
         # Check all messages were combined into one
         assert len(received_messages) == 1
@@ -69,23 +77,24 @@ class TestMessageBuffer:
     @pytest.mark.asyncio
     async def test_timer_reset_on_new_message(self):
         """Test that timer resets when new message arrives."""
-        buffer = MessageBuffer(default_window=0.2)
+        buffer = MessageBuffer(default_window=0.05)
+        loop = asyncio.get_running_loop()
         received_messages = []
         call_times = []
 
         async def callback(combined_message: str):
             received_messages.append(combined_message)
-            call_times.append(asyncio.get_event_loop().time())
+            call_times.append(loop.time())
 
-        start_time = asyncio.get_event_loop().time()
+        start_time = loop.time()
 
         # Send first message
         await buffer.add_message(
             session_id="test_session_3", message="First", callback=callback
         )
 
-        # Wait 150ms (within 200ms window)
-        await asyncio.sleep(0.15)
+        # Wait 25ms (within 50ms window)
+        await asyncio.sleep(0.025)
 
         # Send second message - should reset timer
         await buffer.add_message(
@@ -93,20 +102,19 @@ class TestMessageBuffer:
         )
 
         # Wait for timer
-        await asyncio.sleep(0.25)
+        await asyncio.sleep(0.08)
 
         # Check callback was called once
         assert len(received_messages) == 1
         assert received_messages[0] == "First\nSecond"
 
-        # Check timing - should be ~350ms (150ms + 200ms), not ~200ms
+        # Check timing - should be ~75ms (25ms + 50ms), not ~50ms
         elapsed = call_times[0] - start_time
-        assert elapsed >= 0.35  # At least 350ms
+        assert elapsed >= 0.075  # At least 75ms
 
     @pytest.mark.asyncio
-    async def test_different_sessions_independent(self):
+    async def test_different_sessions_independent(self, buffer):
         """Test that different sessions maintain separate buffers."""
-        buffer = MessageBuffer(default_window=0.2)
         received_messages = {"session1": [], "session2": []}
 
         async def callback_1(msg):
@@ -117,16 +125,22 @@ class TestMessageBuffer:
 
         # Send to session 1
         await buffer.add_message(
-            session_id="session1", message="Session 1 Message", callback=callback_1
+            session_id="session1",
+            message="Session 1 Message",
+            callback=callback_1,
+            debounce_window=0.02,
         )
 
         # Send to session 2
         await buffer.add_message(
-            session_id="session2", message="Session 2 Message", callback=callback_2
+            session_id="session2",
+            message="Session 2 Message",
+            callback=callback_2,
+            debounce_window=0.02,
         )
 
         # Wait for timers
-        await asyncio.sleep(0.3)
+        await asyncio.sleep(0.05)
 
         # Check both were processed independently
         assert len(received_messages["session1"]) == 1
@@ -135,9 +149,13 @@ class TestMessageBuffer:
         assert received_messages["session2"][0] == "Session 2 Message"
 
     @pytest.mark.asyncio
-    async def test_custom_separator(self):
-        """Test using custom message separator."""
-        buffer = MessageBuffer(default_window=0.1, message_separator=" | ")
+    @pytest.mark.parametrize(
+        "separator, expected",
+        [("\n", "Part1\nPart2\nPart3"), (" | ", "Part1 | Part2 | Part3")],
+    )
+    async def test_custom_separator(self, separator, expected):
+        """Test joining messages with different separators."""
+        buffer = MessageBuffer(default_window=0.01, message_separator=separator)
         received_messages = []
 
         async def callback(msg):
@@ -153,15 +171,14 @@ class TestMessageBuffer:
             session_id="test_session_5", message="Part3", callback=callback
         )
 
-        await asyncio.sleep(0.15)
+        await asyncio.sleep(0.04)
 
         assert len(received_messages) == 1
-        assert received_messages[0] == "Part1 | Part2 | Part3"
+        assert received_messages[0] == expected
 
     @pytest.mark.asyncio
-    async def test_get_pending_count(self):
+    async def test_get_pending_count(self, buffer):
         """Test getting pending message count."""
-        buffer = MessageBuffer(default_window=0.5)
 
         async def callback(msg):
             pass
@@ -172,26 +189,31 @@ class TestMessageBuffer:
 
         # Add messages
         await buffer.add_message(
-            session_id="test_session_6", message="Msg1", callback=callback
+            session_id="test_session_6",
+            message="Msg1",
+            callback=callback,
+            debounce_window=0.05,
         )
         count = await buffer.get_pending_count("test_session_6")
         assert count == 1
 
         await buffer.add_message(
-            session_id="test_session_6", message="Msg2", callback=callback
+            session_id="test_session_6",
+            message="Msg2",
+            callback=callback,
+            debounce_window=0.05,
         )
         count = await buffer.get_pending_count("test_session_6")
         assert count == 2
 
         # Wait for flush
-        await asyncio.sleep(0.6)
+        await asyncio.sleep(0.08)
         count = await buffer.get_pending_count("test_session_6")
         assert count == 0
 
     @pytest.mark.asyncio
-    async def test_cancel_pending(self):
+    async def test_cancel_pending(self, buffer):
         """Test cancelling pending timer."""
-        buffer = MessageBuffer(default_window=0.5)
         received_messages = []
 
         async def callback(msg):
@@ -199,7 +221,10 @@ class TestMessageBuffer:
 
         # Add message
         await buffer.add_message(
-            session_id="test_session_7", message="Test", callback=callback
+            session_id="test_session_7",
+            message="Test",
+            callback=callback,
+            debounce_window=0.05,
         )
 
         # Cancel timer
@@ -207,7 +232,7 @@ class TestMessageBuffer:
         assert cancelled is True
 
         # Wait to ensure callback isn't called
-        await asyncio.sleep(0.6)
+        await asyncio.sleep(0.08)
         assert len(received_messages) == 0
 
 
@@ -218,8 +243,20 @@ if __name__ == "__main__":
     async def run_all_tests():
         test = TestMessageBuffer()
 
-        print("Test 1: Single message immediate flush...")
-        await test.test_single_message_immediate_flush()
+        # These tests use distinct session IDs, so their debounce windows
+        # can overlap on one shared buffer
+        print("Tests 1, 4-7: independent sessions (run concurrently)...")
+        buffer = MessageBuffer(default_window=0.01)
+        try:
+            # A failing test cancels the rest instead of leaving them running
+            async with asyncio.TaskGroup() as tg:
+                tg.create_task(test.test_single_message_immediate_flush(buffer))
+                tg.create_task(test.test_different_sessions_independent(buffer))
+                tg.create_task(test.test_custom_separator(" | ", "Part1 | Part2 | Part3"))
+                tg.create_task(test.test_get_pending_count(buffer))
+                tg.create_task(test.test_cancel_pending(buffer))
+        finally:
+            await buffer.close()
         print("✅ PASSED\n")
 
         print("Test 2: Multiple messages combined...")
@@ -230,24 +267,6 @@ if __name__ == "__main__":
         await test.test_timer_reset_on_new_message()
         print("✅ PASSED\n")
 
-        print("Test 4: Different sessions independent...")
-        await test.test_different_sessions_independent()
-        print("✅ PASSED\n")
-
-        print("Test 5: Custom separator...")
-        await test.test_custom_separator()
-        print("✅ PASSED\n")
-
-        print("Test 6: Get pending count...")
-        await test.test_get_pending_count()
-        print("✅ PASSED\n")
-
-        print("Test 7: Cancel pending...")
-        await test.test_cancel_pending()
-        print("✅ PASSED\n")
-
-        print("=" * 50)
-        print("All tests passed! ✅")
-        print("=" * 50)
+        print("=" * 50, "All tests passed! ✅", "=" * 50, sep="\n")
 
     asyncio.run(run_all_tests())
@@ -0,0 +1,67 @@
+"""
+Pickle cache for slow debug-script steps.
+
+Set DEBUG_CACHING=1 to reuse a step's result across reruns instead of
+calling Claude again; delete the cache directory (or unset the variable)
+to go back to live calls.
+
+The cache lives in a per-user directory under the temp dir and is only
+read when that directory and the file belong to the current user, since
+unpickling a planted file would run arbitrary code.
+"""
+
+import functools
+import getpass
+import hashlib
+import os
+import stat
+import pickle
+import tempfile
+from pathlib import Path
+
+_UID = os.getuid() if hasattr(os, "getuid") else None
+_OWNER = _UID if _UID is not None else getpass.getuser()
+CACHE_DIR = Path(tempfile.gettempdir()) / f"claude_code_server_debug_cache-{_OWNER}"
+
+
+def _check_owned(path: Path) -> None:
+    """Refuse paths another user owns or can write to (POSIX only)."""
+    if _UID is None:
+        return
+    st = path.lstat()
+    if stat.S_ISLNK(st.st_mode) or st.st_uid != _UID or st.st_mode & 0o022:
+        raise RuntimeError(f"Refusing debug cache at {path}: not private to this user")
+
+
+def _cache_dir() -> Path:
+    CACHE_DIR.mkdir(mode=0o700, exist_ok=True)
+    _check_owned(CACHE_DIR)
+    return CACHE_DIR
+
+
+def debug_caching(func):
+    """Cache func's return value on disk while DEBUG_CACHING is set.
+
+    Only the function name and keyword arguments form the cache key, so
+    positional arguments such as the agent can differ between runs.
+    """
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not os.environ.get("DEBUG_CACHING"):
+            return func(*args, **kwargs)
+
+        digest = hashlib.sha1(repr(sorted(kwargs.items())).encode()).hexdigest()[:12]
+        path = _cache_dir() / f"{func.__qualname__}-{digest}.pkl"
+        if path.exists():
+            _check_owned(path)
+            print(f"  (cached result from {path})")
+            with path.open("rb") as f:
+                return pickle.load(f)
+
+        result = func(*args, **kwargs)
+        with os.fdopen(os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "wb") as f:
+            pickle.dump(result, f)
+        return result
+
+    return wrapper
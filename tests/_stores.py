@@ -0,0 +1,31 @@
+"""
+Session stores shared by the tests and debug scripts.
+"""
+
+from collections import Counter
+
+from claude_code_server import InMemorySessionStore
+
+
+class CountingStore(InMemorySessionStore):
+    """InMemorySessionStore that counts calls per operation."""
+
+    def __init__(self):
+        super().__init__()
+        self.counts = Counter()
+
+    def get(self, session_id):
+        self.counts["get"] += 1
+        return super().get(session_id)
+
+    def save(self, session):
+        self.counts["save"] += 1
+        super().save(session)
+
+    def delete(self, session_id):
+        self.counts["delete"] += 1
+        super().delete(session_id)
+
+    def exists(self, session_id):
+        self.counts["exists"] += 1
+        return super().exists(session_id)
@@ -3,12 +3,93 @@
 Test the high-level ClaudeAgent API with automatic session management.
 """
 
-import sys
-import os
+import re
+import threading
 
-sys.path.insert(0, os.path.dirname(__file__))
+import pytest
 
-from claude_code_server import ClaudeAgent, ClaudeConfig, OutputFormat
+from claude_code_server import (
+    ClaudeAgent,
+    ClaudeConfig,
+    ClaudeResponse,
+    InMemorySessionStore,
+    OutputFormat,
+)
+
+_NUM_RE = re.compile(r"\d+")
+
+
+def make_cached_agent(store, monkeypatch, resumed=None):
+    """ClaudeAgent with a session cache and a stubbed client that records resume ids."""
+    agent = ClaudeAgent(session_store=store, session_cache_size=16)
+
+    def fake_chat(message, session_id=None, claude_session_id=None, config_override=None):
+        if resumed is not None:
+            resumed.append(claude_session_id)
+        return ClaudeResponse(
+            content=f"echo: {message}",
+            raw_output="",
+            success=True,
+            metadata={"claude_session_id": "claude-123"},
+        )
+
+    monkeypatch.setattr(agent.client, "chat", fake_chat)
+    return agent
+
+
+def test_second_turn_skips_store_reads(counting_store, monkeypatch):
+    """Test that a user's later turns reuse the cached session instead of reading the store."""
+    store = counting_store
+    agent = make_cached_agent(store, monkeypatch)
+
+    agent.chat("Say the number 42", user_id="cache_user")
+    reads_after_first = store.counts["get"]
+    agent.chat("What number did you say?", user_id="cache_user")
+
+    assert store.counts["get"] == reads_after_first
+    session = store.get("user_cache_user")
+    assert session.claude_session_id == "claude-123"
+    assert len(session.conversation_history) == 4
+
+
+def test_cached_session_dropped_when_store_loses_it(counting_store, monkeypatch):
+    """Test that a session deleted (or expired) in the store is not revived from the cache."""
+    store = counting_store
+    resumed = []
+    agent = make_cached_agent(store, monkeypatch, resumed)
+
+    agent.chat("Say the number 42", user_id="cache_user")
+    store.delete("user_cache_user")
+    agent.chat("What number did you say?", user_id="cache_user")
+
+    assert resumed == [None, None]
+    assert len(store.get("user_cache_user").conversation_history) == 2
+
+
+@pytest.mark.asyncio
+async def test_achat_keeps_store_io_off_the_loop(monkeypatch):
+    """Test that achat runs blocking session-store calls in a worker thread."""
+    threads = set()
+
+    class ThreadRecordingStore(InMemorySessionStore):
+        def get(self, session_id):
+            threads.add(threading.get_ident())
+            return super().get(session_id)
+
+        def save(self, session):
+            threads.add(threading.get_ident())
+            super().save(session)
+
+    agent = ClaudeAgent(session_store=ThreadRecordingStore())
+
+    async def fake_achat(message, session_id=None, claude_session_id=None, config_override=None):
+        return ClaudeResponse(content="ok", raw_output="", success=True, metadata={})
+
+    monkeypatch.setattr(agent.client, "achat", fake_achat)
+    await agent.achat("Hello", user_id="cache_user")
+
+    assert threads
+    assert threading.get_ident() not in threads
 
 
 def main():
@@ -40,8 +121,7 @@ def main():
 
     # Check if Claude remembered
     # Extract any number from response2
-    import re
-    numbers = re.findall(r'\d+', response2.content)
+    numbers = _NUM_RE.findall(response2.content)
     if numbers:
         print(f"\n✓ Claude remembered! Found number: {numbers[0]}")
     else:
@@ -1,73 +1,105 @@
 """
-Tests for ClaudeCodeClient.
+Tests for ClaudeClient.
 """
 
+import os
+import subprocess
+
 import pytest
-from claude_code_server import ClaudeCodeClient, ClaudeConfig, OutputFormat, PermissionMode
+from claude_code_server import ClaudeClient, ClaudeConfig, OutputFormat, PermissionMode
 from claude_code_server.exceptions import ClaudeExecutionError, InvalidConfigError
 
 
 def test_client_initialization():
     """Test client can be initialized."""
-    client = ClaudeCodeClient()
+    client = ClaudeClient()
     assert client is not None
     assert client.config is not None
 
 
-def test_get_version():
+def test_get_version(deny_all_client):
     """Test getting Claude CLI version."""
-    client = ClaudeCodeClient()
-    version = client.get_version()
+    version = deny_all_client.get_version()
     assert version
     assert "Claude Code" in version or "claude" in version.lower()
 
 
-def test_simple_chat():
-    """Test simple chat interaction."""
-    client = ClaudeCodeClient(
-        config=ClaudeConfig(
-            output_format=OutputFormat.JSON,
-            permission_mode=PermissionMode.DENY_ALL,  # Don't allow any tool usage
-            timeout=30,
-        )
-    )
+def test_get_version_timeout(monkeypatch):
+    """Test a hung `claude --version` surfaces as ClaudeExecutionError."""
+    from claude_code_server import client as client_module
+
+    def hang(cmd, timeout, **kwargs):
+        raise subprocess.TimeoutExpired(cmd, timeout)
+
+    monkeypatch.setattr(client_module, "_cli_path", lambda: "claude")
+    monkeypatch.setattr(client_module.subprocess, "run", hang)
+    client_module._cli_version.cache_clear()
+    try:
+        with pytest.raises(ClaudeExecutionError):
+            ClaudeClient().get_version()
+    finally:
+        client_module._cli_version.cache_clear()
+
 
-    response = client.chat("Say 'Hello World' and nothing else.")
+@pytest.mark.asyncio
+async def test_simple_chat(deny_all_client):
+    """Test simple chat interaction."""
+    response = await deny_all_client.achat("Say 'Hello World' and nothing else.")
     assert response.success
     assert response.content
     assert "hello" in response.content.lower()
 
 
-def test_chat_with_session():
-    """Test multi-turn conversation with session."""
-    client = ClaudeCodeClient(
-        config=ClaudeConfig(
-            output_format=OutputFormat.JSON,
-            permission_mode=PermissionMode.DENY_ALL,
-        )
+@pytest.mark.asyncio
+async def test_chat_many(deny_all_client):
+    """Test that independent prompts run concurrently and keep their order."""
+    responses = await deny_all_client.chat_many(
+        ["Reply with the word 'apple' only.", "Reply with the word 'banana' only."]
     )
+    assert all(response.success for response in responses)
+    assert "apple" in responses[0].content.lower()
+    assert "banana" in responses[1].content.lower()
 
+
+@pytest.mark.asyncio
+async def test_chat_stream(deny_all_client):
+    """Test that streamed chunks join into the full reply."""
+    chunks = [
+        chunk async for chunk in deny_all_client.achat_stream("Say 'Hello World' and nothing else.")
+    ]
+    assert chunks
+    assert "hello" in "".join(chunks).lower()
+
+
+@pytest.mark.asyncio
+async def test_chat_with_session(pooled_client):
+    """Test multi-turn conversation with session."""
     # First message
     session_id = "test_session_001"
-    response1 = client.chat(
+    response1 = await pooled_client.achat(
         "Remember this number: 42. Just respond 'OK'.",
         session_id=session_id,
     )
     assert response1.success
 
-    # Second message - should remember the number
-    response2 = client.chat(
+    # Second message - resume the Claude session to remember the number
+    # Turns depend on each other, so they stay sequential
+    response2 = await pooled_client.achat(
         "What number did I tell you to remember?",
         session_id=session_id,
+        claude_session_id=response1.metadata.get("claude_session_id"),
     )
     assert response2.success
     assert "42" in response2.content
+    # Both turns ran on the same warm process
+    assert pooled_client.process_pool._bound.get(response1.metadata.get("claude_session_id"))
 
 
-def test_invalid_claude_bin():
-    """Test error handling for invalid Claude binary."""
+def test_missing_sdk(monkeypatch):
+    """Test error handling when the Claude Agent SDK is unavailable."""
+    monkeypatch.setattr("claude_code_server.client.SDK_AVAILABLE", False)
     with pytest.raises(InvalidConfigError):
-        client = ClaudeCodeClient(claude_bin="/nonexistent/claude")
+        ClaudeClient()
 
 
 def test_custom_config():
@@ -79,21 +111,84 @@ def test_custom_config():
         allowed_tools=["Read", "Grep"],
     )
 
-    client = ClaudeCodeClient(config=config)
+    client = ClaudeClient(config=config)
     assert client.config.timeout == 60
     assert client.config.allowed_tools == ["Read", "Grep"]
 
 
+def test_options_built_once_per_client(monkeypatch):
+    """Test that the default config's SDK options are compiled once and only resume varies."""
+    client = ClaudeClient(config=ClaudeConfig(allowed_tools=["Read"]))
+    loads = []
+    monkeypatch.setattr(client, "_load_system_prompt", lambda config: loads.append(config))
+
+    first = client._build_options(client.config, None)
+    resumed = client._build_options(client.config, "claude-123")
+
+    assert len(loads) == 1
+    assert first.resume is None
+    assert resumed.resume == "claude-123"
+    assert resumed.allowed_tools == ["Read"]
+
+    # Overrides are compiled on every call
+    client._build_options(ClaudeConfig(), None)
+    assert len(loads) == 2
+
+
+def test_options_pick_up_prompt_file_changes(tmp_path):
+    """Test that editing CLAUDE.md rebuilds the cached options."""
+    prompt = tmp_path / "CLAUDE.md"
+    prompt.write_text("first", encoding="utf-8")
+    client = ClaudeClient(config=ClaudeConfig(working_directory=str(tmp_path)))
+    assert client._build_options(client.config, None).system_prompt == "first"
+
+    prompt.write_text("second", encoding="utf-8")
+    os.utime(prompt, ns=(prompt.stat().st_atime_ns, prompt.stat().st_mtime_ns + 1_000_000))
+    assert client._build_options(client.config, None).system_prompt == "second"
+
+
+def test_options_do_not_share_lists(monkeypatch):
+    """Test that mutating one call's options leaves later calls untouched."""
+    client = ClaudeClient(config=ClaudeConfig(allowed_tools=["Read"]))
+    monkeypatch.setattr(client, "_load_system_prompt", lambda config: None)
+
+    first = client._build_options(client.config, None)
+    first.allowed_tools.append("Bash")
+    first.setting_sources.clear()
+
+    second = client._build_options(client.config, "claude-123")
+    assert second.allowed_tools == ["Read"]
+    assert second.setting_sources == ["user", "project", "local"]
+
+
 if __name__ == "__main__":
+    import asyncio
+
     # Quick manual test
     print("Running quick manual test...")
-    test_get_version()
+    client = ClaudeClient(
+        config=ClaudeConfig(
+            output_format=OutputFormat.JSON,
+            permission_mode=PermissionMode.DEFAULT,
+            timeout=30,
+        )
+    )
+
+    test_get_version(client)
     print("✓ Version test passed")
 
-    test_simple_chat()
+    asyncio.run(test_simple_chat(client))
     print("✓ Simple chat test passed")
 
-    test_chat_with_session()
+    asyncio.run(test_chat_many(client))
+    print("✓ Concurrent chat test passed")
+
+    asyncio.run(test_chat_stream(client))
+    print("✓ Streaming chat test passed")
+
+    client.start_process_pool(1)
+    asyncio.run(test_chat_with_session(client))
+    client.close_process_pool()
     print("✓ Session test passed")
 
     print("\nAll tests passed!")
@@ -4,23 +4,37 @@ Debug test to see what's happening with session resumption.
 """
 
 import sys
-import os
-
-sys.path.insert(0, os.path.dirname(__file__))
 
 from claude_code_server import ClaudeAgent, ClaudeConfig, OutputFormat
 
+try:
+    from tests._debug_cache import debug_caching
+    from tests._stores import CountingStore
+except ImportError:  # run as a script: python tests/test_debug.py
+    from _debug_cache import debug_caching
+    from _stores import CountingStore
+
+
+@debug_caching
+def first_turn(agent, user_id):
+    """Run the first turn (cached across reruns when DEBUG_CACHING is set)."""
+    response = agent.chat("Say the number 42", user_id=user_id)
+    return response, response.metadata.get("claude_session_id")
+
 
 def main():
     print("=" * 60)
     print("Debug Session Test")
     print("=" * 60)
 
+    store = CountingStore()
     agent = ClaudeAgent(
         config=ClaudeConfig(
             output_format=OutputFormat.JSON,
             timeout=30,
-        )
+        ),
+        session_store=store,
+        session_cache_size=16,
     )
 
     user_id = "debug_user"
@@ -28,13 +42,19 @@ def main():
     # First call
     print("\n[1] First call - No session yet")
     try:
-        response1 = agent.chat("Say the number 42", user_id=user_id)
+        response1, claude_session_id = first_turn(agent, user_id=user_id)
         print(f"✓ Success!")
         print(f"  Content: {response1.content[:100]}")
-        print(f"  Claude session ID: {response1.metadata.get('claude_session_id', 'N/A')}")
+        print(f"  Claude session ID: {claude_session_id or 'N/A'}")
+
+        # A cached first turn never touched this store, so seed the session from it
+        session_id = f"user_{user_id}"
+        agent.session_manager.get_or_create_session(session_id, user_id=user_id)
+        if claude_session_id:
+            agent.session_manager.update_claude_session_id(session_id, claude_session_id)
 
         # Check what was saved
-        session = agent.session_manager.get_session(f"user_{user_id}")
+        session = agent.session_manager.get_session(session_id)
         print(f"  Saved claude_session_id: {session.claude_session_id}")
     except Exception as e:
         print(f"✗ Failed: {e}")
@@ -43,9 +63,11 @@ def main():
     # Second call
     print("\n[2] Second call - Should resume with session")
     try:
+        reads_before = store.counts["get"]
         response2 = agent.chat("What number did you say?", user_id=user_id)
         print(f"✓ Success!")
         print(f"  Content: {response2.content[:100]}")
+        print(f"  Store reads during second call: {store.counts['get'] - reads_before}")
     except Exception as e:
         print(f"✗ Failed: {e}")
         return 1
@@ -3,8 +3,6 @@
 Mock test to understand the session flow.
 """
 
-import json
-
 # Simulate first response (from user's output)
 first_response_json = {
     'type': 'result',
@@ -0,0 +1,158 @@
+"""
+Tests for ClaudeProcessPool, using a stand-in for the SDK client.
+"""
+
+import concurrent.futures
+import itertools
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from claude_code_server import process_pool
+from claude_code_server.process_pool import ClaudeProcessPool
+
+
+class FakeSDKClient:
+    """Stand-in for ClaudeSDKClient: one conversation per process, replies instantly."""
+
+    ids = itertools.count()
+    fail_connects = 0
+    connects = 0
+    prompts = []
+
+    def __init__(self, options):
+        self.session_id = f"session-{next(self.ids)}"
+
+    async def __aenter__(self):
+        FakeSDKClient.connects += 1
+        if FakeSDKClient.fail_connects > 0:
+            FakeSDKClient.fail_connects -= 1
+            raise ConnectionError("CLI failed to start")
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def query(self, prompt):
+        FakeSDKClient.prompts.append(prompt)
+        self.prompt = prompt
+
+    async def receive_response(self):
+        if self.prompt.startswith("slow"):
+            await process_pool.asyncio.sleep(0.2)
+        yield SimpleNamespace(session_id=self.session_id)
+
+
+@pytest.fixture
+def make_pool(monkeypatch):
+    """Build started pools on FakeSDKClient and close them when the test ends."""
+    monkeypatch.setattr(process_pool, "ClaudeSDKClient", FakeSDKClient)
+    monkeypatch.setattr(process_pool, "_RETRY_BASE_DELAY", 0.01)
+    monkeypatch.setattr(FakeSDKClient, "fail_connects", 0)
+    monkeypatch.setattr(FakeSDKClient, "connects", 0)
+    monkeypatch.setattr(FakeSDKClient, "prompts", [])
+    pools = []
+
+    def factory(**kwargs):
+        pool = ClaudeProcessPool(options=None, **kwargs)
+        pools.append(pool)
+        pool.start()
+        return pool
+
+    yield factory
+    for pool in pools:
+        pool.close()
+
+
+def wait_until(condition, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        time.sleep(0.01)
+
+
+def session_of(messages):
+    return messages[-1].session_id
+
+
+def test_new_sessions_keep_spare_workers(make_pool):
+    """Test that binding a worker spawns a spare and no warm process is evicted."""
+    pool = make_pool(size=1, max_processes=3)
+
+    sessions = [session_of(pool.run(f"Hello {i}", None, timeout=1)) for i in range(3)]
+    assert len(set(sessions)) == 3
+    wait_until(lambda: len(pool._bound) == 3)
+
+    # At the process cap: a new session falls back without killing a bound worker
+    assert pool.run("Hello 3", None, timeout=1) is None
+    assert set(pool._bound) == set(sessions)
+
+
+def test_resume_routes_to_bound_worker(make_pool):
+    """Test that follow-up turns go to the process holding the conversation."""
+    pool = make_pool(size=1)
+
+    session = session_of(pool.run("Hello", None, timeout=1))
+    assert session_of(pool.run("Again", session, timeout=1)) == session
+    assert pool.run("Hi", "unknown-session", timeout=1) is None
+
+
+def test_idle_bound_workers_are_reaped(make_pool):
+    """Test that conversations idle past idle_timeout release their process."""
+    pool = make_pool(size=1, idle_timeout=0.05)
+
+    session = session_of(pool.run("Hello", None, timeout=1))
+    wait_until(lambda: session not in pool._bound)
+    wait_until(lambda: len(pool._worker_tasks) == 1)
+    assert pool.run("Again", session, timeout=1) is None
+
+
+def test_failed_workers_are_respawned(make_pool):
+    """Test that workers failing to connect are retried instead of shrinking the pool."""
+    FakeSDKClient.fail_connects = 3
+    pool = make_pool(size=1)
+
+    wait_until(lambda: FakeSDKClient.connects == 4 and pool._idle)
+    assert pool.run("Hello", None, timeout=1) is not None
+
+
+def test_run_timeout_cancels_queued_job(make_pool):
+    """Test that a sync run() that times out does not leave its job to run later."""
+    pool = make_pool(size=1)
+    session = session_of(pool.run("Hello", None, timeout=1))
+
+    slow = threading.Thread(target=pool.run, args=("slow turn", session, 1))
+    slow.start()
+    wait_until(lambda: "slow turn" in FakeSDKClient.prompts)
+
+    with pytest.raises(concurrent.futures.TimeoutError):
+        pool.run("queued turn", session, timeout=0.05)
+    slow.join()
+
+    assert pool.run("next turn", session, timeout=1) is not None
+    assert "queued turn" not in FakeSDKClient.prompts
+
+
+def test_agent_pool_routes_turns_and_releases_on_clear(make_pool, monkeypatch):
+    """Test ClaudeAgent(process_pool_size=...) keeps a conversation on one process."""
+    from claude_code_server import ClaudeAgent
+
+    agent = ClaudeAgent(process_pool_size=1)
+    pool = agent.client.process_pool
+    try:
+        agent.chat("Hello", user_id="pool_user")
+        session = agent.session_manager.get_session("user_pool_user").claude_session_id
+        assert session in pool._bound
+
+        agent.chat("Again", user_id="pool_user")
+        assert agent.session_manager.get_session("user_pool_user").claude_session_id == session
+
+        agent.clear_session("pool_user")
+        wait_until(lambda: session not in pool._bound)
+        # The released process is replaced so a spare stays warm
+        wait_until(lambda: len(pool._idle) == 1)
+    finally:
+        agent.close()
+    assert agent.client.process_pool is None
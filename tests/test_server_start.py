@@ -1,21 +1,59 @@
-#!/usr/bin/env python3
-import sys
-import os
-sys.path.insert(0, os.path.dirname(__file__))
-
-try:
-    from claude_code_server_api import create_app, load_config
-    print("✓ Imports successful")
-    
-    config = load_config("config.yaml")
-    print(f"✓ Config loaded: {config.working_directory}")
-    
-    app = create_app(config)
-    print("✓ App created successfully")
-    print("\nReady to start server!")
-    
-except Exception as e:
-    print(f"✗ Error: {e}")
-    import traceback
-    traceback.print_exc()
-    sys.exit(1)
+"""
+Tests that the API server can be configured and wired.
+"""
+
+import asyncio
+import threading
+
+from claude_code_server import ClaudeResponse
+
+
+def test_app_created(app):
+    """Test that create_app builds the app from config.yaml."""
+    assert app is not None
+
+
+def test_routes_registered(api_client):
+    """Test that the chat and session routes are mounted."""
+    paths = {route.path for route in api_client.app.routes}
+    assert {"/health", "/chat", "/chat/async"} <= paths
+
+
+def test_lifespan_started(api_client):
+    """Test that requests are served by the started app (task manager is up)."""
+    response = api_client.get("/task/missing")
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Task not found"
+
+
+def test_sync_endpoint_concurrency_capped(api_client, monkeypatch):
+    """Test that /chat runs at most max_concurrent_tasks agent calls at once."""
+    import claude_code_server_api.server as server
+
+    limit = server.config.max_concurrent_tasks
+    active = 0
+    peak = 0
+
+    async def fake_achat(message, user_id, session_id=None):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.05)
+        active -= 1
+        return ClaudeResponse(content="ok", raw_output="", success=True, metadata={})
+
+    monkeypatch.setattr(server.agent, "achat", fake_achat)
+    statuses = []
+
+    def post(i):
+        response = api_client.post("/chat", json={"message": "Hi", "user_id": f"cap_{i}"})
+        statuses.append(response.status_code)
+
+    threads = [threading.Thread(target=post, args=(i,)) for i in range(limit * 2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert statuses == [200] * (limit * 2)
+    assert peak == limit
@@ -2,14 +2,28 @@
 Tests for SessionManager.
 """
 
+from collections import Counter
+
 import pytest
 from claude_code_server import SessionManager, InMemorySessionStore
 from claude_code_server.exceptions import SessionNotFoundError
 
 
-def test_create_session():
+@pytest.fixture(scope="module")
+def store():
+    """One in-memory store shared by the module's tests."""
+    return InMemorySessionStore()
+
+
+@pytest.fixture
+def manager(store):
+    """SessionManager on the shared store, emptied after each test."""
+    yield SessionManager(store=store)
+    store._store.clear()
+
+
+def test_create_session(manager):
     """Test session creation."""
-    manager = SessionManager()
     session = manager.create_session("test_001", user_id="user_123")
 
     assert session.session_id == "test_001"
@@ -17,27 +31,22 @@ def test_create_session():
     assert len(session.conversation_history) == 0
 
 
-def test_get_session():
+def test_get_session(manager):
     """Test retrieving existing session."""
-    manager = SessionManager()
     manager.create_session("test_001")
 
     session = manager.get_session("test_001")
     assert session.session_id == "test_001"
 
 
-def test_get_nonexistent_session():
+def test_get_nonexistent_session(manager):
     """Test error when getting nonexistent session."""
-    manager = SessionManager()
-
     with pytest.raises(SessionNotFoundError):
         manager.get_session("nonexistent")
 
 
-def test_get_or_create_session():
+def test_get_or_create_session(manager):
     """Test get_or_create_session behavior."""
-    manager = SessionManager()
-
     # Should create new session
     session1 = manager.get_or_create_session("test_001")
     assert session1.session_id == "test_001"
@@ -47,9 +56,8 @@ def test_get_or_create_session():
     assert session2.session_id == "test_001"
 
 
-def test_add_message():
+def test_add_message(manager):
     """Test adding messages to session."""
-    manager = SessionManager()
     manager.create_session("test_001")
 
     # Add user message
@@ -65,14 +73,13 @@ def test_add_message():
     assert len(session.conversation_history) == 2
 
 
-def test_conversation_history():
+def test_conversation_history(manager):
     """Test getting conversation history."""
-    manager = SessionManager()
     manager.create_session("test_001")
 
-    manager.add_message("test_001", "user", "Message 1")
-    manager.add_message("test_001", "assistant", "Reply 1")
-    manager.add_message("test_001", "user", "Message 2")
+    manager.add_messages(
+        "test_001", [("user", "Message 1"), ("assistant", "Reply 1"), ("user", "Message 2")]
+    )
 
     history = manager.get_conversation_history("test_001")
     assert len(history) == 3
@@ -81,9 +88,48 @@ def test_conversation_history():
     assert history[2].content == "Message 2"
 
 
-def test_delete_session():
+def test_add_messages_preserves_order(manager):
+    """Test adding several messages at once keeps their order."""
+    manager.create_session("test_001")
+    manager.add_message("test_001", "user", "Message 1")
+
+    manager.add_messages(
+        "test_001", [("assistant", "Reply 1"), ("user", "Message 2"), ("assistant", "Reply 2")]
+    )
+
+    history = manager.get_conversation_history("test_001")
+    assert [(m.role, m.content) for m in history] == [
+        ("user", "Message 1"),
+        ("assistant", "Reply 1"),
+        ("user", "Message 2"),
+        ("assistant", "Reply 2"),
+    ]
+
+
+def test_get_session_is_single_read(counting_store):
+    """Test get_session reads the store exactly once."""
+    store = counting_store
+    manager = SessionManager(store=store)
+    manager.create_session("test_001")
+    store.counts.clear()
+
+    manager.get_session("test_001")
+    assert store.counts == Counter(get=1)
+
+
+def test_add_messages_is_single_round_trip(counting_store):
+    """Test a batch of messages costs one read and one write."""
+    store = counting_store
+    manager = SessionManager(store=store)
+    manager.create_session("test_001")
+    store.counts.clear()
+
+    manager.add_messages("test_001", [("user", "Hello"), ("assistant", "Hi there!")])
+    assert store.counts == Counter(get=1, save=1)
+
+
+def test_delete_session(manager):
     """Test session deletion."""
-    manager = SessionManager()
     manager.create_session("test_001")
 
     manager.delete_session("test_001")
@@ -96,16 +142,19 @@ if __name__ == "__main__":
     # Quick manual test
     print("Running session manager tests...")
 
-    test_create_session()
+    test_create_session(SessionManager())
     print("✓ Create session test passed")
 
-    test_get_session()
+    test_get_session(SessionManager())
     print("✓ Get session test passed")
 
-    test_add_message()
+    test_add_message(SessionManager())
     print("✓ Add message test passed")
 
-    test_conversation_history()
+    test_conversation_history(SessionManager())
     print("✓ Conversation history test passed")
 
+    test_add_messages_preserves_order(SessionManager())
+    print("✓ Add messages test passed")
+
     print("\nAll session tests passed!")
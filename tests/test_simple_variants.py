@@ -0,0 +1,36 @@
+"""
+Two-turn memory test for both agent flavours.
+
+SimpleAgent replays history in the prompt (no --resume); ClaudeAgent resumes
+the Claude session.
+"""
+
+import pytest
+
+from claude_code_server import ClaudeAgent, SimpleAgent
+
+
+@pytest.mark.parametrize(
+    "factory, kwargs",
+    [
+        (SimpleAgent, {"max_history_length": 5}),  # Keep last 5 turns
+        (ClaudeAgent, {}),
+    ],
+    ids=["SimpleAgent", "ClaudeAgent"],
+)
+def test_two_turn_memory(factory, kwargs, default_config):
+    """Test that the second turn remembers the first."""
+    agent = factory(config=default_config, **kwargs)
+    user_id = "test_user"
+
+    r1 = agent.chat("My favorite number is 42", user_id=user_id)
+    print(f"✓ Claude: {r1.content[:100]}")
+
+    r2 = agent.chat("What's my favorite number?", user_id=user_id)
+    print(f"✓ Claude: {r2.content[:100]}")
+
+    assert "42" in r2.content
+
+    history = agent.get_conversation_history(user_id)
+    assert [msg.role for msg in history] == ["user", "assistant", "user", "assistant"]
+
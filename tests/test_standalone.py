@@ -9,9 +9,7 @@ in a standalone Python application, not within Claude Code itself.
 import sys
 import os
 
-sys.path.insert(0, os.path.dirname(__file__))
-
-from claude_code_server import ClaudeCodeClient, ClaudeConfig, OutputFormat
+from claude_code_server import ClaudeClient, ClaudeConfig, OutputFormat
 
 
 def main():
@@ -28,7 +26,7 @@ def main():
         print("   2. Run: python3 test_standalone.py")
         print("\n   Continuing anyway, but it may hang...\n")
 
-    client = ClaudeCodeClient(
+    client = ClaudeClient(
         config=ClaudeConfig(
             output_format=OutputFormat.JSON,
             timeout=10,
@@ -0,0 +1,368 @@
+"""
+Tests for TaskManager.
+"""
+
+import asyncio
+import pytest
+import pytest_asyncio
+
+from claude_code_server import ClaudeResponse
+from claude_code_server_api.message_buffer import MessageBuffer
+from claude_code_server_api.tasks import TaskManager
+
+
+class FakeAgent:
+    """Stand-in for ClaudeAgent that echoes the message back."""
+
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.calls = []
+
+    def chat(self, message, user_id, session_id=None):
+        self.calls.append((message, user_id, session_id))
+        if self.fail:
+            raise RuntimeError("boom")
+        return ClaudeResponse(
+            content=f"echo: {message}",
+            raw_output="",
+            success=True,
+            metadata={"claude_session_id": "claude-123"},
+        )
+
+    async def achat(self, message, user_id, session_id=None):
+        return self.chat(message, user_id, session_id)
+
+
+@pytest_asyncio.fixture
+async def make_manager():
+    """Build TaskManagers and stop their workers when the test ends."""
+    managers = []
+
+    def factory(**kwargs):
+        manager = TaskManager(**kwargs)
+        managers.append(manager)
+        return manager
+
+    yield factory
+    for manager in managers:
+        await manager.shutdown(timeout=1)
+
+
+async def wait_for_task(manager: TaskManager, task_id: str):
+    for _ in range(100):
+        status = manager.get_task_status(task_id)
+        if status.status in ("completed", "failed"):
+            return status
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"Task {task_id} did not finish")
+
+
+@pytest.mark.asyncio
+async def test_task_completes(make_manager):
+    """Test that a task runs the agent and stores the result."""
+    manager = make_manager()
+    agent = FakeAgent()
+
+    task_id = manager.create_task(agent, "Hello", "alice", None)
+    status = await wait_for_task(manager, task_id)
+
+    assert status.status == "completed"
+    assert status.result.content == "echo: Hello"
+    assert status.result.session_id == "user_alice"
+    assert status.result.claude_session_id == "claude-123"
+    assert status.completed_at is not None
+    assert agent.calls == [("Hello", "alice", None)]
+
+
+@pytest.mark.asyncio
+async def test_task_failure(make_manager):
+    """Test that agent errors mark the task as failed."""
+    manager = make_manager()
+
+    task_id = manager.create_task(FakeAgent(fail=True), "Hello", "bob", "custom")
+    status = await wait_for_task(manager, task_id)
+
+    assert status.status == "failed"
+    assert status.error == "boom"
+    assert status.result is None
+
+
+@pytest.mark.asyncio
+async def test_status_readable_outside_the_loop(make_manager):
+    """Test that task status can be read from a thread without a running loop."""
+    manager = make_manager()
+
+    task_id = manager.create_task(FakeAgent(), "Hello", "carol", None)
+    await wait_for_task(manager, task_id)
+    status = await asyncio.to_thread(manager.get_task_status, task_id)
+
+    assert status.status == "completed"
+    assert status.created_at <= status.completed_at
+
+
+@pytest.mark.asyncio
+async def test_unknown_task(make_manager):
+    """Test that unknown task IDs return None."""
+    manager = make_manager()
+    assert manager.get_task_status("missing") is None
+
+
+@pytest.mark.asyncio
+async def test_cleanup_old_tasks(make_manager):
+    """Test that only finished tasks older than max age are removed."""
+    manager = make_manager()
+    agent = FakeAgent()
+
+    task_id = manager.create_task(agent, "Hello", "carol", None)
+    await wait_for_task(manager, task_id)
+
+    await manager.cleanup_old_tasks(max_age_seconds=3600)
+    assert manager.get_task_status(task_id) is not None
+
+    await manager.cleanup_old_tasks(max_age_seconds=-1)
+    assert manager.get_task_status(task_id) is None
+
+
+@pytest.mark.asyncio
+async def test_task_ids_unique(make_manager):
+    """Test that task IDs are short, unique hex handles."""
+    manager = make_manager()
+    agent = FakeAgent()
+
+    task_ids = [manager.create_task(agent, "Hi", "dave", None) for _ in range(3)]
+
+    assert len(set(task_ids)) == 3
+    assert all(len(task_id) == 16 for task_id in task_ids)
+    assert all(int(task_id, 16) >= 0 for task_id in task_ids)
+    for task_id in task_ids:
+        await wait_for_task(manager, task_id)
+
+
+@pytest.mark.asyncio
+async def test_max_tasks_evicts_oldest(make_manager):
+    """Test that the task table is capped at max_tasks."""
+    manager = make_manager(max_tasks=2)
+    agent = FakeAgent()
+
+    task_ids = [manager.create_task(agent, "Hi", "erin", None) for _ in range(3)]
+
+    assert manager.get_task_status(task_ids[0]) is None
+    assert len(manager.tasks) == 2
+    for task_id in task_ids[1:]:
+        await wait_for_task(manager, task_id)
+
+
+@pytest.mark.asyncio
+async def test_cleaned_up_records_are_reused(make_manager):
+    """Test that records freed by cleanup are reset before reuse."""
+    manager = make_manager()
+    agent = FakeAgent()
+
+    old_id = manager.create_task(agent, "Hello", "frank", None)
+    await wait_for_task(manager, old_id)
+    await manager.cleanup_old_tasks(max_age_seconds=-1)
+    assert len(manager._record_pool) == 1
+
+    new_id = manager.create_task(agent, "Again", "frank", None)
+    assert len(manager._record_pool) == 0
+    status = manager.get_task_status(new_id)
+    assert status.task_id == new_id
+    assert status.result is None
+    assert status.completed_at is None
+    await wait_for_task(manager, new_id)
+
+
+@pytest.mark.asyncio
+async def test_completion_list_tracks_finished_tasks(make_manager):
+    """Test that cleanup and eviction keep the completion list consistent."""
+    manager = make_manager(max_tasks=3)
+    agent = FakeAgent()
+
+    task_ids = []
+    for _ in range(3):
+        task_id = manager.create_task(agent, "Hi", "grace", None)
+        await wait_for_task(manager, task_id)
+        task_ids.append(task_id)
+
+    def completed_ids():
+        ids, task = [], manager._completed_head
+        while task:
+            ids.append(task.task_id)
+            task = task.next
+        return ids
+
+    assert completed_ids() == task_ids
+
+    # Evicting the oldest finished task unlinks it
+    newest_id = manager.create_task(agent, "Hi", "grace", None)
+    assert completed_ids() == task_ids[1:]
+    await wait_for_task(manager, newest_id)
+    assert completed_ids() == task_ids[1:] + [newest_id]
+
+    await manager.cleanup_old_tasks(max_age_seconds=-1)
+    assert completed_ids() == []
+    assert manager._completed_tail is None
+    assert len(manager.tasks) == 0
+
+
+@pytest.mark.asyncio
+async def test_duplicate_inflight_requests_share_result(make_manager):
+    """Test that identical concurrent requests only call the agent once."""
+    manager = make_manager()
+    agent = FakeAgent()
+
+    first_id = manager.create_task(agent, "Hello", "heidi", None)
+    second_id = manager.create_task(agent, "Hello", "heidi", None)
+    other_id = manager.create_task(agent, "Different", "heidi", None)
+
+    first = await wait_for_task(manager, first_id)
+    second = await wait_for_task(manager, second_id)
+    await wait_for_task(manager, other_id)
+
+    assert first_id != second_id
+    assert second.status == "completed"
+    assert second.result.content == first.result.content
+    assert sorted(agent.calls) == [("Different", "heidi", None), ("Hello", "heidi", None)]
+    assert manager._inflight == {}
+
+
+@pytest.mark.asyncio
+async def test_cleanup_keeps_unexpired_tasks(make_manager):
+    """Test that a partial cleanup keeps younger tasks linked and queryable."""
+    manager = make_manager()
+    agent = FakeAgent()
+
+    async def run_tasks(message):
+        task_ids = []
+        for _ in range(2):
+            task_id = manager.create_task(agent, message, "ivan", None)
+            await wait_for_task(manager, task_id)
+            task_ids.append(task_id)
+        return task_ids
+
+    old_ids = await run_tasks("Old")
+    await asyncio.sleep(0.05)
+    young_ids = await run_tasks("Young")
+
+    await manager.cleanup_old_tasks(max_age_seconds=0.04)
+
+    assert all(manager.get_task_status(task_id) is None for task_id in old_ids)
+    assert all(manager.get_task_status(task_id) is not None for task_id in young_ids)
+    assert manager._completed_head.task_id == young_ids[0]
+    assert manager._completed_head.prev is None
+    assert manager._completed_tail.task_id == young_ids[1]
+
+
+@pytest.mark.asyncio
+async def test_shutdown_waits_for_running_tasks(make_manager):
+    """Test that shutdown drains queued tasks and stops the workers."""
+    manager = make_manager(max_workers=1)
+
+    class SlowAgent(FakeAgent):
+        async def achat(self, message, user_id, session_id=None):
+            await asyncio.sleep(0.05)
+            return self.chat(message, user_id, session_id)
+
+    agent = SlowAgent()
+    task_ids = [manager.create_task(agent, f"Hello {i}", "judy", None) for i in range(2)]
+
+    await manager.shutdown(timeout=1)
+
+    assert all(manager.get_task_status(t).status == "completed" for t in task_ids)
+    assert len(manager._workers) == 0
+
+
+@pytest.mark.asyncio
+async def test_full_queue_rejects_new_tasks(make_manager):
+    """Test that create_task raises QueueFull when too many tasks are waiting."""
+    manager = make_manager(max_workers=1, max_queue_size=1)
+    agent = FakeAgent()
+
+    task_id = manager.create_task(agent, "First", "kate", None)
+    # Identical requests attach to the in-flight task instead of queueing
+    duplicate_id = manager.create_task(agent, "First", "kate", None)
+
+    with pytest.raises(asyncio.QueueFull):
+        manager.create_task(agent, "Second", "kate", None)
+
+    await wait_for_task(manager, task_id)
+    await wait_for_task(manager, duplicate_id)
+
+
+@pytest.mark.asyncio
+async def test_debounced_flush_waits_for_queue_space(make_manager):
+    """Test that flushes arriving at a full queue wait instead of being dropped."""
+    manager = make_manager(max_workers=1, max_queue_size=1)
+    release = asyncio.Event()
+
+    class BlockedAgent(FakeAgent):
+        async def achat(self, message, user_id, session_id=None):
+            await release.wait()
+            return self.chat(message, user_id, session_id)
+
+    agent = BlockedAgent()
+    buffer = MessageBuffer(default_window=0.01)
+    task_ids = []
+
+    async def flush(combined_message):
+        task_ids.append(await manager.submit_task(agent, combined_message, "lee", None))
+
+    try:
+        for i in range(3):
+            await buffer.add_message(f"session_{i}", f"Hello {i}", flush)
+        await asyncio.sleep(0.05)
+
+        # One task running, one queued, the third flush waiting for space
+        assert len(task_ids) == 2
+        with pytest.raises(asyncio.QueueFull):
+            manager.create_task(agent, "Other", "lee", None)
+
+        release.set()
+        for _ in range(100):
+            if len(task_ids) == 3:
+                break
+            await asyncio.sleep(0.01)
+        statuses = [await wait_for_task(manager, task_id) for task_id in task_ids]
+    finally:
+        release.set()
+        await buffer.close()
+
+    assert [status.status for status in statuses] == ["completed"] * 3
+    assert sorted(call[0] for call in agent.calls) == ["Hello 0", "Hello 1", "Hello 2"]
+
+
+@pytest.mark.asyncio
+async def test_cancelled_submit_releases_duplicates(make_manager):
+    """Test that a submit cancelled while waiting for space does not strand duplicates."""
+    manager = make_manager(max_workers=1, max_queue_size=1)
+    release = asyncio.Event()
+
+    class BlockedAgent(FakeAgent):
+        async def achat(self, message, user_id, session_id=None):
+            await release.wait()
+            return self.chat(message, user_id, session_id)
+
+    agent = BlockedAgent()
+    try:
+        manager.create_task(agent, "Running", "mia", None)
+        await asyncio.sleep(0.01)
+        queued_id = manager.create_task(agent, "Queued", "mia", None)
+
+        submit = asyncio.create_task(manager.submit_task(agent, "Waiting", "mia", None))
+        await asyncio.sleep(0.01)
+        duplicate_id = manager.create_task(agent, "Waiting", "mia", None)
+
+        submit.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await submit
+        status = await wait_for_task(manager, duplicate_id)
+    finally:
+        release.set()
+
+    assert status.status == "failed"
+    assert status.error == "Task cancelled"
+
+    # A fresh identical request queues normally instead of attaching to the stale entry
+    await wait_for_task(manager, queued_id)
+    task_id = manager.create_task(agent, "Waiting", "mia", None)
+    assert (await wait_for_task(manager, task_id)).status == "completed"